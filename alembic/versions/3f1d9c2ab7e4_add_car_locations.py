@@ -0,0 +1,36 @@
+"""add_car_locations
+
+Revision ID: 3f1d9c2ab7e4
+Revises: eb7ab81560d6
+Create Date: 2026-10-19 10:12:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1d9c2ab7e4'
+down_revision: Union[str, Sequence[str], None] = 'eb7ab81560d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cars', sa.Column('track', sa.String(), nullable=True))
+    op.add_column('cars', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('cars', sa.Column('longitude', sa.Float(), nullable=True))
+    op.create_index('ix_cars_track_status', 'cars', ['track', 'status'], unique=False)
+    op.create_index('ix_cars_lat_lon', 'cars', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cars_lat_lon', table_name='cars')
+    op.drop_index('ix_cars_track_status', table_name='cars')
+    op.drop_column('cars', 'longitude')
+    op.drop_column('cars', 'latitude')
+    op.drop_column('cars', 'track')
@@ -0,0 +1,39 @@
+"""add_daily_stats
+
+Revision ID: 8a4c2e6f0b13
+Revises: 3f1d9c2ab7e4
+Create Date: 2026-10-19 11:03:27.114592
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4c2e6f0b13'
+down_revision: Union[str, Sequence[str], None] = '3f1d9c2ab7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('new_users', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rentals_started', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('topups_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue_uah', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_index(op.f('ix_rentals_status'), 'rentals', ['status'], unique=False)
+    # Fill the table from history with scripts/backfill_daily_stats.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rentals_status'), table_name='rentals')
+    op.drop_table('daily_stats')
@@ -0,0 +1,28 @@
+"""unique_transactions_order_id
+
+Revision ID: 9d41f6b2e8c5
+Revises: 5c2d8e91f7a3
+Create Date: 2026-10-19 15:44:37.518094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41f6b2e8c5'
+down_revision: Union[str, Sequence[str], None] = '5c2d8e91f7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_transactions_liqpay_order_id'), 'transactions', ['liqpay_order_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transactions_liqpay_order_id'), table_name='transactions')
@@ -0,0 +1,34 @@
+"""add_email_outbox_priority
+
+Revision ID: a3e6c1f82d59
+Revises: f1d7b3c94a28
+Create Date: 2026-10-19 19:58:33.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e6c1f82d59'
+down_revision: Union[str, Sequence[str], None] = 'f1d7b3c94a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('priority', sa.SmallInteger(), nullable=False, server_default='0'))
+    op.execute("UPDATE email_outbox SET priority = 1 WHERE kind = 'announcement'")
+    op.create_index(
+        'ix_email_outbox_pending_priority', 'email_outbox', ['priority', 'id'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_pending_priority', table_name='email_outbox')
+    op.drop_column('email_outbox', 'priority')
@@ -0,0 +1,44 @@
+"""add_payment_webhooks
+
+Revision ID: a7f3c5e20d94
+Revises: 9d41f6b2e8c5
+Create Date: 2026-10-19 16:08:52.770341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7f3c5e20d94'
+down_revision: Union[str, Sequence[str], None] = '9d41f6b2e8c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('payment_webhooks',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('order_id', sa.String(), nullable=False),
+    sa.Column('provider_status', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'provider_status', name='uq_payment_webhooks_order_status')
+    )
+    op.create_index('ix_payment_webhooks_status_next', 'payment_webhooks', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_payment_webhooks_status_next', table_name='payment_webhooks')
+    op.drop_table('payment_webhooks')
@@ -0,0 +1,28 @@
+"""add_transactions_status_created_index
+
+Revision ID: b2e8d4f61c37
+Revises: a7f3c5e20d94
+Create Date: 2026-10-19 16:31:14.006452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8d4f61c37'
+down_revision: Union[str, Sequence[str], None] = 'a7f3c5e20d94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_status_created', 'transactions', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_status_created', table_name='transactions')
@@ -0,0 +1,31 @@
+"""add_transactions_user_created_index
+
+Revision ID: c4a9e7d05b18
+Revises: b2e8d4f61c37
+Create Date: 2026-10-19 16:52:48.331907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e7d05b18'
+down_revision: Union[str, Sequence[str], None] = 'b2e8d4f61c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_transactions_user_created', 'transactions', ['user_id', 'created_at', 'id'], unique=False,
+        postgresql_include=['amount_uah', 'minutes_added', 'status'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_user_created', table_name='transactions')
@@ -0,0 +1,50 @@
+"""add_usage_buckets
+
+Revision ID: c7e29b5d4f81
+Revises: 8a4c2e6f0b13
+Create Date: 2026-10-19 12:41:09.627310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e29b5d4f81'
+down_revision: Union[str, Sequence[str], None] = '8a4c2e6f0b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rentals', sa.Column('cost_uah', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False))
+    op.create_table('usage_buckets',
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('car_id', sa.UUID(), nullable=False),
+    sa.Column('topups_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('topup_revenue_uah', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.Column('rentals_started', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rental_minutes_sold', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rental_revenue_uah', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.Column('active_drivers', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'car_id')
+    )
+    op.create_table('usage_bucket_drivers',
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('car_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'car_id', 'user_id')
+    )
+    # Fill from history with scripts/backfill_analytics.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usage_bucket_drivers')
+    op.drop_table('usage_buckets')
+    op.drop_column('rentals', 'cost_uah')
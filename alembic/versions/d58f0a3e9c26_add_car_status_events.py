@@ -0,0 +1,57 @@
+"""add_car_status_events
+
+Revision ID: d58f0a3e9c26
+Revises: c7e29b5d4f81
+Create Date: 2026-10-19 13:20:54.873106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd58f0a3e9c26'
+down_revision: Union[str, Sequence[str], None] = 'c7e29b5d4f81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    carstatus = postgresql.ENUM('FREE', 'BUSY', 'OFFLINE', name='carstatus', create_type=False)
+    op.create_table('car_status_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('car_id', sa.UUID(), nullable=False),
+    sa.Column('status', carstatus, nullable=False),
+    sa.Column('at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_car_status_events_car_at', 'car_status_events', ['car_id', 'at'], unique=False)
+    op.create_index('ix_car_status_events_at', 'car_status_events', ['at'], unique=False)
+    op.create_table('car_utilization_daily',
+    sa.Column('car_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('busy_seconds', sa.Integer(), nullable=False),
+    sa.Column('free_seconds', sa.Integer(), nullable=False),
+    sa.Column('offline_seconds', sa.Integer(), nullable=False),
+    sa.Column('utilization_pct', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('car_id', 'day')
+    )
+    op.create_index(op.f('ix_car_utilization_daily_day'), 'car_utilization_daily', ['day'], unique=False)
+    # Seed the log with each car's current status so the sweep has a starting point
+    op.execute(
+        "INSERT INTO car_status_events (car_id, status, at) "
+        "SELECT id, status, (now() AT TIME ZONE 'utc') FROM cars"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_car_utilization_daily_day'), table_name='car_utilization_daily')
+    op.drop_table('car_utilization_daily')
+    op.drop_index('ix_car_status_events_at', table_name='car_status_events')
+    op.drop_index('ix_car_status_events_car_at', table_name='car_status_events')
+    op.drop_table('car_status_events')
@@ -0,0 +1,28 @@
+"""add_rentals_user_started_index
+
+Revision ID: e1b74c08a5d2
+Revises: d58f0a3e9c26
+Create Date: 2026-10-19 13:58:32.240417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b74c08a5d2'
+down_revision: Union[str, Sequence[str], None] = 'd58f0a3e9c26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_rentals_user_started', 'rentals', ['user_id', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rentals_user_started', table_name='rentals')
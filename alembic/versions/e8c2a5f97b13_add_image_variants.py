@@ -0,0 +1,31 @@
+"""add_image_variants
+
+Revision ID: e8c2a5f97b13
+Revises: d6b1f83a9e27
+Create Date: 2026-10-19 18:02:41.519204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2a5f97b13'
+down_revision: Union[str, Sequence[str], None] = 'd6b1f83a9e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cars', sa.Column('image_variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('users', sa.Column('avatar_variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'avatar_variants')
+    op.drop_column('cars', 'image_variants')
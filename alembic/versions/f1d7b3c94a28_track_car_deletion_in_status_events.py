@@ -0,0 +1,38 @@
+"""track_car_deletion_in_status_events
+
+Revision ID: f1d7b3c94a28
+Revises: e8c2a5f97b13
+Create Date: 2026-10-19 19:41:07.263518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d7b3c94a28'
+down_revision: Union[str, Sequence[str], None] = 'e8c2a5f97b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    carstatus = postgresql.ENUM('FREE', 'BUSY', 'OFFLINE', name='carstatus', create_type=False)
+    # NULL status marks the car's deletion
+    op.alter_column('car_status_events', 'status', existing_type=carstatus, nullable=True)
+    # Close the history of cars deleted before deletions were logged
+    op.execute(
+        "INSERT INTO car_status_events (car_id, status, at) "
+        "SELECT DISTINCT e.car_id, NULL, (now() AT TIME ZONE 'utc') FROM car_status_events e "
+        "WHERE NOT EXISTS (SELECT 1 FROM cars c WHERE c.id = e.car_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    carstatus = postgresql.ENUM('FREE', 'BUSY', 'OFFLINE', name='carstatus', create_type=False)
+    op.execute("DELETE FROM car_status_events WHERE status IS NULL")
+    op.alter_column('car_status_events', 'status', existing_type=carstatus, nullable=False)
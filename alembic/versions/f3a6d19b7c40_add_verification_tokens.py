@@ -0,0 +1,42 @@
+"""add_verification_tokens
+
+Revision ID: f3a6d19b7c40
+Revises: e1b74c08a5d2
+Create Date: 2026-10-19 14:21:05.618230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a6d19b7c40'
+down_revision: Union[str, Sequence[str], None] = 'e1b74c08a5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('verification_tokens',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('purpose', sa.String(length=16), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('token', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email', 'purpose', name='uq_verification_tokens_email_purpose'),
+    sa.UniqueConstraint('token')
+    )
+    op.create_index(op.f('ix_verification_tokens_expires_at'), 'verification_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_verification_tokens_expires_at'), table_name='verification_tokens')
+    op.drop_table('verification_tokens')
@@ -11,6 +11,21 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Separate, small pool for bulk exports so long-running cursors never take
+# connections away from request traffic
+export_engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    pool_size=settings.EXPORT_POOL_SIZE,
+    max_overflow=0
+)
+
+ExportSessionLocal = sessionmaker(
+    bind=export_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 async def get_db():
@@ -26,6 +41,15 @@ async def init_db():
     from app.models.support import SupportTicket
     from app.models.offer import RentalOffer
     from app.models.car_tariff import CarTariff
+    from app.models.daily_stats import DailyStats
+    from app.models.usage_bucket import UsageBucket, UsageBucketDriver
+    from app.models.car_status_event import CarStatusEvent
+    from app.models.car_utilization import CarUtilizationDaily
+    from app.models.verification_token import VerificationToken
+    from app.models.refresh_token import RefreshToken
+    from app.models.rate_limit_bucket import RateLimitBucket
+    from app.models.payment_webhook import PaymentWebhook
+    from app.models.email_outbox import EmailOutbox
     
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Uncomment to reset DB
@@ -4,7 +4,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 import sys
 import asyncio
+import logging
 
+# Root handler for the app's loggers (payments audit trail, auth, mail)
+logging.basicConfig(level=logging.INFO)
 
 
 app = FastAPI(title="FPV Racer Pro")
@@ -25,14 +28,43 @@ async def startup_event():
     # Start Rental Monitor Background Task
     from app.services.rental_monitor import start_rental_monitor
     asyncio.create_task(start_rental_monitor())
+    # Daily per-car utilization from the status event log
+    from app.services.utilization import start_utilization_worker
+    asyncio.create_task(start_utilization_worker())
+    # Applies stored LiqPay callbacks
+    from app.services.payment_inbox import start_payment_inbox_worker
+    asyncio.create_task(start_payment_inbox_worker())
+    # Resolves top-ups whose callback never arrived
+    from app.services.payment_reconciler import start_payment_reconciler
+    asyncio.create_task(start_payment_reconciler())
+    # Delivers queued emails
+    from app.services.email_outbox import start_email_outbox_worker
+    asyncio.create_task(start_email_outbox_worker())
+    # Expired verification / reset codes
+    from app.services.token_store import start_token_eviction
+    asyncio.create_task(start_token_eviction())
+    if settings.RATE_LIMIT_BACKEND == "database":
+        from app.services.rate_limit import start_rate_limit_cleanup
+        asyncio.create_task(start_rate_limit_cleanup())
+    # Resized WebP/AVIF copies of images uploaded before the image pipeline
+    from app.services.images import backfill_variants
+    asyncio.create_task(backfill_variants())
+    # Deletes uploads no car or user points at anymore
+    from app.services.upload_gc import start_upload_gc
+    asyncio.create_task(start_upload_gc())
+    # Keep Google's signing keys warm for /api/auth/google
+    if settings.GOOGLE_CLIENT_ID:
+        from app.services.google_auth import start_google_keys_refresh
+        asyncio.create_task(start_google_keys_refresh())
 
-from app.routers import auth, users, cars, websockets, rentals, payments, admin, support, uploads
+from app.routers import auth, users, cars, websockets, rentals, payments, admin, support, uploads, exports
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(cars.router)
 app.include_router(rentals.router)
 app.include_router(payments.router)
 app.include_router(admin.router)
+app.include_router(exports.router)
 app.include_router(support.router)
 app.include_router(uploads.router)
 app.include_router(websockets.router)
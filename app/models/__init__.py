@@ -3,3 +3,12 @@ from .car import Car, CarStatus
 from .car_tariff import CarTariff
 from .rental import Rental, RentalStatus
 from .transaction import Transaction, TransactionStatus
+from .daily_stats import DailyStats
+from .usage_bucket import UsageBucket, UsageBucketDriver
+from .car_status_event import CarStatusEvent
+from .car_utilization import CarUtilizationDaily
+from .verification_token import VerificationToken
+from .refresh_token import RefreshToken
+from .rate_limit_bucket import RateLimitBucket
+from .payment_webhook import PaymentWebhook
+from .email_outbox import EmailOutbox
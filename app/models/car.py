@@ -1,9 +1,9 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import String, Integer, DateTime, Enum, Numeric
+from sqlalchemy import String, Integer, DateTime, Enum, Numeric, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.database import Base
 
 class CarStatus(str, PyEnum):
@@ -18,9 +18,13 @@ class Car(Base):
     name: Mapped[str] = mapped_column(String)
     status: Mapped[CarStatus] = mapped_column(Enum(CarStatus), default=CarStatus.OFFLINE)
     vdo_ninja_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    location: Mapped[str | None] = mapped_column(String, nullable=True)
+    location: Mapped[str | None] = mapped_column(String, nullable=True)  # Free-text, shown as-is
+    track: Mapped[str | None] = mapped_column(String, nullable=True)  # Track / site slug used for search
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
     image_url: Mapped[str | None] = mapped_column(String, nullable=True)  # PNG image path
+    image_variants: Mapped[dict | None] = mapped_column(JSONB, nullable=True)  # {format: {width: url}}, see services/images.py
     price_per_minute: Mapped[float] = mapped_column(Numeric(10, 2), default=1.00)  # UAH per minute
     raspberry_id: Mapped[str] = mapped_column(String, unique=True, index=True)
     battery_level: Mapped[int] = mapped_column(Integer, default=100)
@@ -28,3 +32,8 @@ class Car(Base):
 
     rentals = relationship("Rental", back_populates="car")
     tariffs = relationship("CarTariff", back_populates="car", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_cars_track_status", "track", "status"),
+        Index("ix_cars_lat_lon", "latitude", "longitude"),
+    )
@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Enum, Index, event, inspect
+from sqlalchemy.orm import Mapped, mapped_column, Session
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.models.car import Car, CarStatus
+
+class CarStatusEvent(Base):
+    """Append-only log of car status transitions (input for utilization stats)"""
+    __tablename__ = "car_status_events"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    # No FK: history must survive car deletion
+    car_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
+    status: Mapped[CarStatus | None] = mapped_column(Enum(CarStatus), nullable=True)  # None: car deleted
+    at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_car_status_events_car_at", "car_id", "at"),
+        Index("ix_car_status_events_at", "at"),
+    )
+
+@event.listens_for(Session, "before_flush")
+def record_car_status_changes(session, flush_context, instances):
+    """
+    Logs every Car status change in the same flush, whichever code path made it
+    (rentals, monitor, admin edits, scripts). Deleting a car logs a final
+    event with no status, which ends its utilization tracking.
+    """
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, Car):
+            if obj.id is None:
+                obj.id = uuid.uuid4()
+            session.add(CarStatusEvent(car_id=obj.id, status=obj.status or CarStatus.OFFLINE, at=now))
+
+    for obj in session.dirty:
+        if isinstance(obj, Car):
+            history = inspect(obj).attrs.status.history
+            if history.has_changes() and history.added and history.added[0] not in history.deleted:
+                session.add(CarStatusEvent(car_id=obj.id, status=history.added[0], at=now))
+
+    for obj in session.deleted:
+        if isinstance(obj, Car):
+            session.add(CarStatusEvent(car_id=obj.id, status=None, at=now))
@@ -0,0 +1,18 @@
+import uuid
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Integer, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class CarUtilizationDaily(Base):
+    """Seconds spent per status per car per (UTC) day, precomputed from car_status_events"""
+    __tablename__ = "car_utilization_daily"
+
+    car_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+    busy_seconds: Mapped[int] = mapped_column(Integer, default=0)
+    free_seconds: Mapped[int] = mapped_column(Integer, default=0)
+    offline_seconds: Mapped[int] = mapped_column(Integer, default=0)
+    utilization_pct: Mapped[float] = mapped_column(Float, default=0.0)  # busy / tracked time
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class DailyStats(Base):
+    """
+    Incremental per-day counters for the admin dashboard.
+    Updated in the same transaction as the event they count (see app/services/rollups.py),
+    rebuilt from history with scripts/backfill_daily_stats.py.
+    """
+    __tablename__ = "daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rentals_started: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    topups_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    revenue_uah: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, Integer, SmallInteger, DateTime, Text, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class EmailOutbox(Base):
+    """
+    Outgoing emails, delivered by the email outbox worker.
+    status: "pending" -> "sent", or "dead" after too many failed attempts.
+    """
+    __tablename__ = "email_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32))  # verification / reset / support_reply
+    recipient: Mapped[str] = mapped_column(String)
+    subject: Mapped[str] = mapped_column(String)
+    html: Mapped[str] = mapped_column(Text)  # Cleared once sent (may contain codes)
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    priority: Mapped[int] = mapped_column(SmallInteger, default=0)  # 0: transactional, 1: bulk (sent after)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next", "status", "next_attempt_at"),
+        Index("ix_email_outbox_pending_priority", "priority", "id", postgresql_where=text("status = 'pending'")),
+    )
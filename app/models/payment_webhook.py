@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, Integer, DateTime, Text, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+class PaymentWebhook(Base):
+    """
+    Inbox of verified LiqPay callbacks, applied by the payment inbox worker.
+    status: "pending" -> "done", or "dead" after too many failed attempts.
+    """
+    __tablename__ = "payment_webhooks"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    order_id: Mapped[str] = mapped_column(String)
+    provider_status: Mapped[str] = mapped_column(String)
+    payload: Mapped[dict] = mapped_column(JSONB)  # Decoded LiqPay data
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # LiqPay redelivers the same result; keep one row per (order, status)
+        UniqueConstraint("order_id", "provider_status", name="uq_payment_webhooks_order_status"),
+        Index("ix_payment_webhooks_status_next", "status", "next_attempt_at"),
+    )
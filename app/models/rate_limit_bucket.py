@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import String, Float, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RateLimitBucket(Base):
+    """Token buckets of the shared (database) rate limiter backend"""
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)  # "<rule>:<scope>:<ip or email>"
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, index=True)
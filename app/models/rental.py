@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import ForeignKey, DateTime, Integer, Enum
+from sqlalchemy import ForeignKey, DateTime, Integer, Enum, Numeric, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
@@ -20,8 +20,9 @@ class Rental(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     duration_minutes: Mapped[int] = mapped_column(Integer)
     extended_minutes: Mapped[int] = mapped_column(Integer, default=0)
+    cost_uah: Mapped[float] = mapped_column(Numeric(10, 2), default=0, server_default="0")  # Charged so far, incl. extensions
     ended_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-    status: Mapped[RentalStatus] = mapped_column(Enum(RentalStatus), default=RentalStatus.ACTIVE)
+    status: Mapped[RentalStatus] = mapped_column(Enum(RentalStatus), default=RentalStatus.ACTIVE, index=True)
     
     # New columns for Stage 3
     issue_report: Mapped[str | None] = mapped_column(nullable=True)
@@ -31,6 +32,10 @@ class Rental(Base):
     user = relationship("User", back_populates="rentals")
     car = relationship("Car", back_populates="rentals")
 
+    __table_args__ = (
+        Index("ix_rentals_user_started", "user_id", "started_at"),
+    )
+
     @property
     def car_name(self):
         return self.car.name if self.car else None
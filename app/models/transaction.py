@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import ForeignKey, DateTime, Integer, Enum, Numeric, String
+from sqlalchemy import ForeignKey, DateTime, Integer, Enum, Numeric, String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
@@ -18,8 +18,18 @@ class Transaction(Base):
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
     amount_uah: Mapped[float] = mapped_column(Numeric(10, 2))
     minutes_added: Mapped[int] = mapped_column(Integer)
-    liqpay_order_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    liqpay_order_id: Mapped[str | None] = mapped_column(String, nullable=True, unique=True, index=True)
     status: Mapped[TransactionStatus] = mapped_column(Enum(TransactionStatus), default=TransactionStatus.PENDING)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        # Reconciler scan: stale PENDING transactions, oldest first
+        Index("ix_transactions_status_created", "status", "created_at"),
+        # Payment history: index-only scans per user, newest first
+        Index(
+            "ix_transactions_user_created", "user_id", "created_at", "id",
+            postgresql_include=["amount_uah", "minutes_added", "status"],
+        ),
+    )
@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+# car_id used for fleet-wide rows (top-ups and fleet totals)
+FLEET_ID = uuid.UUID(int=0)
+
+class UsageBucket(Base):
+    """
+    Pre-aggregated hourly / daily usage, per car and fleet-wide.
+    Filled incrementally by app/services/analytics.py, rebuilt with scripts/backfill_analytics.py.
+    """
+    __tablename__ = "usage_buckets"
+
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)  # "hour" / "day"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    car_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)  # FLEET_ID for fleet-wide
+    topups_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    topup_revenue_uah: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    rentals_started: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rental_minutes_sold: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rental_revenue_uah: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    active_drivers: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+class UsageBucketDriver(Base):
+    """Drivers already counted in a bucket, so active_drivers stays a distinct count"""
+    __tablename__ = "usage_bucket_drivers"
+
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    car_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
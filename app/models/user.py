@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import String, Integer, DateTime, Enum, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.database import Base
 
 class UserRole(str, PyEnum):
@@ -18,6 +18,7 @@ class User(Base):
     password_hash: Mapped[str | None] = mapped_column(String, nullable=True)
     name: Mapped[str] = mapped_column(String)
     avatar_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    avatar_variants: Mapped[dict | None] = mapped_column(JSONB, nullable=True)  # {format: {width: url}}, see services/images.py
     balance_minutes: Mapped[int] = mapped_column(Integer, default=0)
     balance: Mapped[float] = mapped_column(Numeric(10, 2), default=0.00)
     role: Mapped[UserRole] = mapped_column(Enum(UserRole), default=UserRole.USER)
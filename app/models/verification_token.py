@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, Integer, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class VerificationToken(Base):
+    """Email verification / password reset codes (database token store backend)"""
+    __tablename__ = "verification_tokens"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    email: Mapped[str] = mapped_column(String)
+    purpose: Mapped[str] = mapped_column(String(16))  # "verify" / "reset" / "login"
+    code: Mapped[str] = mapped_column(String)
+    token: Mapped[str | None] = mapped_column(String, nullable=True, unique=True)  # Magic-link token
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("email", "purpose", name="uq_verification_tokens_email_purpose"),
+    )
@@ -1,20 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import func, and_, delete
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, timedelta
+from sqlalchemy import func, and_, or_, delete, tuple_
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import base64
+import json
 import uuid
 
 from app.database import get_db
 from app.models.offer import RentalOffer
 from app.models.user import User
-from app.models.car import Car
+from app.models.car import Car, CarStatus
+from app.models.car_tariff import CarTariff
 from app.models.rental import Rental, RentalStatus
 from app.models.transaction import Transaction, TransactionStatus
+from app.models.daily_stats import DailyStats
+from app.models.refresh_token import RefreshToken
+from app.models.car_utilization import CarUtilizationDaily
 from app.routers.auth import get_admin_user
+from app.services.pricing import invalidate_car_pricing, pricing_cache_stats
+from app.services.principal_cache import principal_cache_stats
+from app.services.rate_limit import auth_limiter
+from app.services import analytics, utilization, payment_inbox, payment_reconciler, email_outbox, upload_gc
+from app.utils.cache import TTLCache
+from app.utils.email import render as render_email
+from app.utils.security import password_pool_stats
+from app.config import settings
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -36,6 +50,22 @@ class OfferResponse(OfferBase):
     class Config:
         from_attributes = True
 
+class TariffBase(BaseModel):
+    name: str
+    duration_minutes: int = Field(gt=0)
+    price: float = Field(ge=0)
+    is_active: bool = True
+
+class TariffCreate(TariffBase):
+    pass
+
+class TariffResponse(TariffBase):
+    id: uuid.UUID
+    car_id: uuid.UUID
+    
+    class Config:
+        from_attributes = True
+
 class UserSummary(BaseModel):
     id: uuid.UUID
     email: str
@@ -101,76 +131,215 @@ class DashboardStats(BaseModel):
     total_cars: int
     online_cars: int
 
+class AnalyticsPoint(BaseModel):
+    bucket_start: datetime
+    topups_count: int
+    topup_revenue_uah: float
+    rentals_started: int
+    rental_minutes_sold: int
+    rental_revenue_uah: float
+    active_drivers: int
+    
+    class Config:
+        from_attributes = True
+
+class CarUsageTotals(BaseModel):
+    car_id: uuid.UUID
+    car_name: Optional[str] = None
+    rentals_started: int
+    rental_minutes_sold: int
+    rental_revenue_uah: float
+
+class CarUtilization(BaseModel):
+    car_id: uuid.UUID
+    day: date
+    busy_seconds: int
+    free_seconds: int
+    offline_seconds: int
+    utilization_pct: float
+    
+    class Config:
+        from_attributes = True
+
+class UserPage(BaseModel):
+    items: List[UserSummary]
+    next_cursor: Optional[str] = None
+
 class UserHistory(BaseModel):
     user: UserSummary
     rentals: List[RentalResponse]
     transactions: List[TransactionResponse]
+    total_transactions: int = 0  # For paging through `transactions`
 
 # ===== Dashboard Stats =====
 
+_stats_cache = TTLCache(maxsize=1, ttl=settings.ADMIN_STATS_CACHE_SECONDS)
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
-    # Total users
-    users_count = await db.execute(select(func.count(User.id)))
-    total_users = users_count.scalar() or 0
-    
-    # Total rentals
-    rentals_count = await db.execute(select(func.count(Rental.id)))
-    total_rentals = rentals_count.scalar() or 0
-    
-    # Active rentals
-    active_count = await db.execute(
-        select(func.count(Rental.id)).where(Rental.status == RentalStatus.ACTIVE)
-    )
-    active_rentals = active_count.scalar() or 0
-    
-    # Total revenue (successful transactions)
-    revenue_result = await db.execute(
-        select(func.sum(Transaction.amount_uah)).where(Transaction.status == TransactionStatus.SUCCESS)
+    cached = _stats_cache.get("stats")
+    if cached is not None:
+        return cached
+
+    # One round trip: revenue and rental totals come from the daily rollups,
+    # the rest are counts over small tables / indexed columns
+    today = datetime.utcnow().date()
+    query = select(
+        select(func.count(User.id)).scalar_subquery().label("total_users"),
+        select(func.coalesce(func.sum(DailyStats.rentals_started), 0)).scalar_subquery().label("total_rentals"),
+        select(func.count(Rental.id)).where(Rental.status == RentalStatus.ACTIVE).scalar_subquery().label("active_rentals"),
+        select(func.coalesce(func.sum(DailyStats.revenue_uah), 0)).scalar_subquery().label("total_revenue"),
+        select(func.coalesce(func.sum(DailyStats.revenue_uah), 0)).where(DailyStats.day == today).scalar_subquery().label("revenue_today"),
+        select(func.count(Car.id)).scalar_subquery().label("total_cars"),
+        select(func.count(Car.id)).where(Car.status != CarStatus.OFFLINE).scalar_subquery().label("online_cars"),
     )
-    total_revenue = float(revenue_result.scalar() or 0)
-    
-    # Revenue today
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_revenue = await db.execute(
-        select(func.sum(Transaction.amount_uah)).where(
-            and_(
-                Transaction.status == TransactionStatus.SUCCESS,
-                Transaction.created_at >= today_start
-            )
-        )
+    row = (await db.execute(query)).one()
+
+    stats = DashboardStats(
+        total_users=row.total_users or 0,
+        total_rentals=row.total_rentals or 0,
+        active_rentals=row.active_rentals or 0,
+        total_revenue=float(row.total_revenue or 0),
+        revenue_today=float(row.revenue_today or 0),
+        total_cars=row.total_cars or 0,
+        online_cars=row.online_cars or 0
     )
-    revenue_today = float(today_revenue.scalar() or 0)
-    
-    # Cars stats
-    cars_count = await db.execute(select(func.count(Car.id)))
-    total_cars = cars_count.scalar() or 0
-    
-    online_count = await db.execute(
-        select(func.count(Car.id)).where(Car.status != 'offline')
+    _stats_cache.set("stats", stats)
+    return stats
+
+@router.get("/metrics")
+async def get_cache_metrics(admin: User = Depends(get_admin_user)):
+    """This worker's cache hit rates, password hashing load and auth rate limiting"""
+    return {
+        "auth": principal_cache_stats(),
+        "pricing": pricing_cache_stats(),
+        "dashboard_stats": _stats_cache.stats(),
+        "password_hashing": password_pool_stats(),
+        "auth_rate_limit": auth_limiter.stats(),
+    }
+
+@router.get("/payments/inbox")
+async def get_payment_inbox_stats(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    """LiqPay callback inbox: rows per status, oldest pending, this worker's processing lag"""
+    return await payment_inbox.inbox_stats(db)
+
+@router.get("/emails/outbox")
+async def get_email_outbox_stats(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    """Email outbox: messages per status, oldest pending, this worker's delivery numbers"""
+    return await email_outbox.outbox_stats(db)
+
+class BroadcastRequest(BaseModel):
+    subject: str = Field(..., min_length=1, max_length=200)
+    message: str = Field(..., min_length=1)
+    verified_only: bool = True
+
+@router.post("/emails/broadcast")
+async def broadcast_email(data: BroadcastRequest, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    """Queues an announcement for every user (rendered once, inserted in one statement)"""
+    html = render_email("announcement", title=data.subject, message=data.message, app_url=settings.APP_URL)
+    recipients = select(User.email)
+    if data.verified_only:
+        recipients = recipients.where(User.is_verified == True)
+    queued = await email_outbox.enqueue_bulk(db, "announcement", data.subject, html, recipients)
+    return {"queued": queued}
+
+@router.post("/payments/reconcile")
+async def run_payment_reconciliation(admin: User = Depends(get_admin_user)):
+    """Runs one reconciliation round now (it also runs periodically)"""
+    checked = await payment_reconciler.reconciler.run_once()
+    return {"checked": checked, "stats": payment_reconciler.reconciler.stats}
+
+@router.post("/uploads/gc")
+async def run_upload_gc(admin: User = Depends(get_admin_user)):
+    """Deletes unreferenced uploads now (it also runs periodically)"""
+    deleted = await upload_gc.collect_garbage()
+    return {"deleted": deleted, "stats": upload_gc.stats}
+
+# ===== Users Management =====
+
+def user_totals_subqueries():
+    """Per-user rental count and successful top-up sum, aggregated in SQL"""
+    rentals_sq = (
+        select(Rental.user_id.label("user_id"), func.count(Rental.id).label("total_rentals"))
+        .group_by(Rental.user_id)
+        .subquery()
     )
-    online_cars = online_count.scalar() or 0
-    
-    return DashboardStats(
-        total_users=total_users,
-        total_rentals=total_rentals,
-        active_rentals=active_rentals,
-        total_revenue=total_revenue,
-        revenue_today=revenue_today,
-        total_cars=total_cars,
-        online_cars=online_cars
+    spent_sq = (
+        select(Transaction.user_id.label("user_id"), func.sum(Transaction.amount_uah).label("total_spent"))
+        .where(Transaction.status == TransactionStatus.SUCCESS)
+        .group_by(Transaction.user_id)
+        .subquery()
     )
+    return rentals_sq, spent_sq
 
-# ===== Users Management =====
+def _encode_cursor(value, user_id) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif value is not None and not isinstance(value, (int, str)):
+        value = str(value)  # Decimal
+    raw = json.dumps([value, str(user_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-@router.get("/users", response_model=List[UserSummary])
-async def list_users(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
-    result = await db.execute(
-        select(User).options(selectinload(User.rentals), selectinload(User.transactions))
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if sort == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort == "total_spent":
+            value = Decimal(value)
+        else:
+            value = int(value)
+        return value, uuid.UUID(user_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    q: Optional[str] = None,
+    sort: Literal["created_at", "total_spent", "total_rentals"] = "created_at",
+    order: Literal["desc", "asc"] = "desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Users with their rental count and total spend, computed by grouped subqueries.
+    Keyset-paginated: pass `next_cursor` from the previous page as `cursor`.
+    """
+    rentals_sq, spent_sq = user_totals_subqueries()
+    total_rentals = func.coalesce(rentals_sq.c.total_rentals, 0)
+    total_spent = func.coalesce(spent_sq.c.total_spent, 0)
+    sort_expr = {"created_at": User.created_at, "total_spent": total_spent, "total_rentals": total_rentals}[sort]
+
+    query = (
+        select(User, total_rentals.label("total_rentals"), total_spent.label("total_spent"))
+        .outerjoin(rentals_sq, rentals_sq.c.user_id == User.id)
+        .outerjoin(spent_sq, spent_sq.c.user_id == User.id)
     )
-    users = result.scalars().all()
-    
-    return [
+    if q:
+        pattern = f"%{q.strip()}%"
+        query = query.where(or_(User.email.ilike(pattern), User.name.ilike(pattern)))
+
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort)
+        if order == "desc":
+            query = query.where(tuple_(sort_expr, User.id) < tuple_(value, last_id))
+        else:
+            query = query.where(tuple_(sort_expr, User.id) > tuple_(value, last_id))
+
+    if order == "desc":
+        query = query.order_by(sort_expr.desc(), User.id.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), User.id.asc())
+
+    # Fetch one extra row to know whether there is a next page
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
         UserSummary(
             id=u.id,
             email=u.email,
@@ -179,12 +348,20 @@ async def list_users(db: AsyncSession = Depends(get_db), admin: User = Depends(g
             role=u.role.value if hasattr(u.role, 'value') else str(u.role),
             is_verified=u.is_verified,
             created_at=u.created_at,
-            total_rentals=len(u.rentals),
-            total_spent=sum(t.amount_uah for t in u.transactions if t.status == TransactionStatus.SUCCESS)
+            total_rentals=rentals_count,
+            total_spent=float(spent)
         )
-        for u in users
+        for u, rentals_count, spent in rows
     ]
 
+    next_cursor = None
+    if has_more and rows:
+        last_user, last_rentals, last_spent = rows[-1]
+        last_value = {"created_at": last_user.created_at, "total_spent": last_spent, "total_rentals": last_rentals}[sort]
+        next_cursor = _encode_cursor(last_value, last_user.id)
+
+    return UserPage(items=items, next_cursor=next_cursor)
+
 @router.delete("/users/{user_id}")
 async def delete_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
     # Get user
@@ -197,6 +374,7 @@ async def delete_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_db), ad
     # Delete related data first (Manual Cascade)
     await db.execute(delete(Transaction).where(Transaction.user_id == user_id))
     await db.execute(delete(Rental).where(Rental.user_id == user_id))
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
     
     # Delete support tickets (if any)
     # Note: SupportTicket model might act differently, but good to clean if linked
@@ -210,22 +388,44 @@ async def delete_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_db), ad
     return {"message": "User and all related data deleted successfully"}
 
 @router.get("/users/{user_id}/history", response_model=UserHistory)
-async def get_user_history(user_id: uuid.UUID, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
-    # Get user with relationships
+async def get_user_history(
+    user_id: uuid.UUID,
+    rentals_limit: int = Query(50, ge=1, le=500),
+    rentals_offset: int = Query(0, ge=0),
+    transactions_limit: int = Query(50, ge=1, le=500),
+    transactions_offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    # User with totals computed by aggregate subqueries
+    total_rentals = (
+        select(func.count(Rental.id)).where(Rental.user_id == User.id).scalar_subquery()
+    )
+    total_spent = (
+        select(func.coalesce(func.sum(Transaction.amount_uah), 0))
+        .where(Transaction.user_id == User.id, Transaction.status == TransactionStatus.SUCCESS)
+        .scalar_subquery()
+    )
+    total_transactions = (
+        select(func.count(Transaction.id)).where(Transaction.user_id == User.id).scalar_subquery()
+    )
     result = await db.execute(
-        select(User).where(User.id == user_id).options(
-            selectinload(User.rentals),
-            selectinload(User.transactions)
-        )
+        select(User, total_rentals, total_spent, total_transactions).where(User.id == user_id)
     )
-    user = result.scalars().first()
+    row = result.first()
     
-    if not user:
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
+    user, rentals_count, spent, transactions_count = row
     
-    # Get rentals with car names
+    # One page of rentals with car names, newest first
     rentals_result = await db.execute(
-        select(Rental, Car.name).join(Car).where(Rental.user_id == user_id).order_by(Rental.started_at.desc())
+        select(Rental, Car.name)
+        .join(Car)
+        .where(Rental.user_id == user_id)
+        .order_by(Rental.started_at.desc(), Rental.id.desc())
+        .offset(rentals_offset)
+        .limit(rentals_limit)
     )
     rentals_data = rentals_result.all()
     
@@ -244,6 +444,14 @@ async def get_user_history(user_id: uuid.UUID, db: AsyncSession = Depends(get_db
         for r in rentals_data
     ]
     
+    # One page of transactions, newest first
+    transactions_result = await db.execute(
+        select(Transaction)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        .offset(transactions_offset)
+        .limit(transactions_limit)
+    )
     transactions = [
         TransactionResponse(
             id=t.id,
@@ -253,7 +461,7 @@ async def get_user_history(user_id: uuid.UUID, db: AsyncSession = Depends(get_db
             status=t.status.value if hasattr(t.status, 'value') else str(t.status),
             created_at=t.created_at
         )
-        for t in sorted(user.transactions, key=lambda x: x.created_at, reverse=True)
+        for t in transactions_result.scalars().all()
     ]
     
     user_summary = UserSummary(
@@ -264,11 +472,16 @@ async def get_user_history(user_id: uuid.UUID, db: AsyncSession = Depends(get_db
         role=user.role.value if hasattr(user.role, 'value') else str(user.role),
         is_verified=user.is_verified,
         created_at=user.created_at,
-        total_rentals=len(user.rentals),
-        total_spent=sum(t.amount_uah for t in user.transactions if t.status == TransactionStatus.SUCCESS)
+        total_rentals=rentals_count or 0,
+        total_spent=float(spent or 0)
     )
     
-    return UserHistory(user=user_summary, rentals=rentals, transactions=transactions)
+    return UserHistory(
+        user=user_summary,
+        rentals=rentals,
+        transactions=transactions,
+        total_transactions=transactions_count or 0
+    )
 
 # ===== Transactions =====
 
@@ -302,40 +515,42 @@ async def list_transactions(
 
 # ===== Cars with Current Drivers =====
 
-@router.get("/cars/active", response_model=List[CarWithDriver])
-async def get_cars_with_drivers(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
-    # Get all cars
-    cars_result = await db.execute(select(Car))
-    cars = cars_result.scalars().all()
-    
-    result = []
-    for car in cars:
-        # Find active rental for this car
-        rental_result = await db.execute(
-            select(Rental, User.name, User.email)
-            .join(User)
-            .where(and_(Rental.car_id == car.id, Rental.status == RentalStatus.ACTIVE))
-        )
-        active_rental = rental_result.first()
-        
+async def load_fleet(db: AsyncSession, car_ids: Optional[List[uuid.UUID]] = None) -> List[CarWithDriver]:
+    """Cars with their current driver (if any) in a single joined query"""
+    query = (
+        select(Car, Rental, User.name, User.email)
+        .outerjoin(Rental, and_(Rental.car_id == Car.id, Rental.status == RentalStatus.ACTIVE))
+        .outerjoin(User, User.id == Rental.user_id)
+        .order_by(Car.name, Car.id, Rental.started_at.desc())
+    )
+    if car_ids is not None:
+        query = query.where(Car.id.in_(car_ids))
+    rows = (await db.execute(query)).all()
+
+    fleet = {}
+    for car, rental, driver_name, driver_email in rows:
+        # Only the newest active rental counts if a car somehow has several
+        if car.id in fleet:
+            continue
         car_data = CarWithDriver(
             id=car.id,
             name=car.name,
             status=car.status.value if hasattr(car.status, 'value') else str(car.status),
             battery_level=car.battery_level
         )
-        
-        if active_rental:
-            rental, driver_name, driver_email = active_rental
+        if rental:
             car_data.current_driver_id = rental.user_id
             car_data.current_driver_name = driver_name
             car_data.current_driver_email = driver_email
             car_data.rental_started_at = rental.started_at
             car_data.rental_ends_at = rental.started_at + timedelta(minutes=rental.duration_minutes + rental.extended_minutes)
-        
-        result.append(car_data)
-    
-    return result
+        fleet[car.id] = car_data
+
+    return list(fleet.values())
+
+@router.get("/cars/active", response_model=List[CarWithDriver])
+async def get_cars_with_drivers(db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    return await load_fleet(db)
 
 # ===== Offers CRUD (existing) =====
 
@@ -377,3 +592,147 @@ async def delete_offer(offer_id: uuid.UUID, db: AsyncSession = Depends(get_db),
     await db.commit()
     return {"message": "Offer deleted"}
 
+# ===== Car Tariffs CRUD =====
+
+async def _get_tariff(db: AsyncSession, car_id: uuid.UUID, tariff_id: uuid.UUID) -> CarTariff:
+    result = await db.execute(
+        select(CarTariff).where(CarTariff.id == tariff_id, CarTariff.car_id == car_id)
+    )
+    tariff = result.scalars().first()
+    if not tariff:
+        raise HTTPException(status_code=404, detail="Tariff not found")
+    return tariff
+
+@router.get("/cars/{car_id}/tariffs", response_model=List[TariffResponse])
+async def list_car_tariffs(car_id: uuid.UUID, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    result = await db.execute(
+        select(CarTariff).where(CarTariff.car_id == car_id).order_by(CarTariff.duration_minutes)
+    )
+    return result.scalars().all()
+
+@router.post("/cars/{car_id}/tariffs", response_model=TariffResponse)
+async def create_car_tariff(car_id: uuid.UUID, tariff: TariffCreate, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    car_result = await db.execute(select(Car.id).where(Car.id == car_id))
+    if not car_result.scalar():
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    new_tariff = CarTariff(car_id=car_id, **tariff.dict())
+    db.add(new_tariff)
+    await db.commit()
+    await db.refresh(new_tariff)
+    invalidate_car_pricing(car_id)
+    return new_tariff
+
+@router.put("/cars/{car_id}/tariffs/{tariff_id}", response_model=TariffResponse)
+async def update_car_tariff(car_id: uuid.UUID, tariff_id: uuid.UUID, tariff: TariffCreate, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    db_tariff = await _get_tariff(db, car_id, tariff_id)
+    for key, value in tariff.dict().items():
+        setattr(db_tariff, key, value)
+
+    await db.commit()
+    await db.refresh(db_tariff)
+    invalidate_car_pricing(car_id)
+    return db_tariff
+
+@router.delete("/cars/{car_id}/tariffs/{tariff_id}")
+async def delete_car_tariff(car_id: uuid.UUID, tariff_id: uuid.UUID, db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)):
+    db_tariff = await _get_tariff(db, car_id, tariff_id)
+    await db.delete(db_tariff)
+    await db.commit()
+    invalidate_car_pricing(car_id)
+    return {"message": "Tariff deleted"}
+
+# ===== Analytics (reads pre-aggregated buckets only) =====
+
+MAX_ANALYTICS_RANGE = {"hour": timedelta(days=31), "day": timedelta(days=366 * 2)}
+
+def _analytics_range(granularity: str, date_from: Optional[datetime], date_to: Optional[datetime]):
+    date_to = date_to or datetime.utcnow()
+    date_from = date_from or date_to - (timedelta(days=7) if granularity == "hour" else timedelta(days=30))
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    if date_to - date_from > MAX_ANALYTICS_RANGE[granularity]:
+        raise HTTPException(status_code=400, detail=f"Range too large for {granularity} buckets")
+    return date_from, date_to
+
+@router.get("/analytics", response_model=List[AnalyticsPoint])
+async def get_analytics_series(
+    granularity: Literal["hour", "day"] = "day",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    car_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """Time series of top-ups, minutes sold, revenue and active drivers; fleet-wide unless car_id is set"""
+    date_from, date_to = _analytics_range(granularity, date_from, date_to)
+    return await analytics.get_series(db, granularity, date_from, date_to, car_id)
+
+@router.get("/analytics/cars", response_model=List[CarUsageTotals])
+async def get_analytics_by_car(
+    granularity: Literal["hour", "day"] = "day",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """Revenue and minutes per car over a period, highest revenue first"""
+    date_from, date_to = _analytics_range(granularity, date_from, date_to)
+    rows = await analytics.get_car_totals(db, granularity, date_from, date_to)
+
+    names_result = await db.execute(select(Car.id, Car.name).where(Car.id.in_([r.car_id for r in rows])))
+    names = dict(names_result.all())
+    return [
+        CarUsageTotals(
+            car_id=r.car_id,
+            car_name=names.get(r.car_id),
+            rentals_started=r.rentals_started or 0,
+            rental_minutes_sold=r.rental_minutes_sold or 0,
+            rental_revenue_uah=float(r.rental_revenue_uah or 0)
+        )
+        for r in rows
+    ]
+
+# ===== Car Utilization (precomputed daily rows) =====
+
+@router.get("/utilization", response_model=List[CarUtilization])
+async def get_car_utilization(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    car_id: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """Daily BUSY/FREE/OFFLINE seconds per car for days in [date_from, date_to]"""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_to - date_from > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Range too large")
+
+    query = (
+        select(CarUtilizationDaily)
+        .where(CarUtilizationDaily.day >= date_from, CarUtilizationDaily.day <= date_to)
+        .order_by(CarUtilizationDaily.day, CarUtilizationDaily.car_id)
+    )
+    if car_id:
+        query = query.where(CarUtilizationDaily.car_id == car_id)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+@router.post("/utilization/recompute")
+async def recompute_car_utilization(
+    date_from: date,
+    date_to: date,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """Rebuilds utilization rows for [date_from, date_to] (complete days only)"""
+    today = datetime.utcnow().date()
+    day_to = min(date_to + timedelta(days=1), today)
+    if date_from >= day_to:
+        raise HTTPException(status_code=400, detail="Nothing to compute for this range")
+    if day_to - date_from > timedelta(days=92):
+        raise HTTPException(status_code=400, detail="Range too large")
+
+    written = await utilization.compute_days(db, date_from, day_to)
+    return {"message": "Utilization recomputed", "rows": written}
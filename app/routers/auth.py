@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi.security import OAuth2PasswordBearer
@@ -12,13 +12,20 @@ from app.database import get_db
 from app.models.user import User
 from app.schemas.user import (
     UserCreate, UserLogin, GoogleLogin, Token, 
-    UserResponse, PasswordRecovery, PasswordReset
+    UserResponse, PasswordRecovery, PasswordReset, RefreshRequest, MagicLoginRequest
 )
 from app.utils.security import (
-    verify_password, get_password_hash, 
-    create_access_token, decode_access_token, verify_google_token
+    hash_password_async, verify_password_async
 )
 from app.utils.email import send_verification_email, send_reset_email
+from app.services.rollups import bump_daily_stats
+from app.services.token_store import token_store, VERIFY, RESET, LOGIN
+from app.services.principal_cache import resolve_token, load_principal
+from app.services.google_auth import verify_google_token
+from app.services import refresh_tokens
+from app.services.rate_limit import auth_limiter
+from app.config import settings
+from datetime import timedelta
 
 # Налаштування логування
 logger = logging.getLogger("auth")
@@ -27,16 +34,13 @@ router = APIRouter(prefix="/api/auth", tags=["Auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
-# In-memory storage (Для продакшну рекомендується використовувати Redis)
-# Формат: {email: {"code": "123456", "token": "uuid", "type": "verify/reset"}}
-verification_store = {}
-
 @router.post("/register")
 async def register(
     user_data: UserCreate, 
-    tasks: BackgroundTasks, 
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
+    await auth_limiter.check("register", request)
     logger.info(f"Registering new user: {user_data.email}")
     
     # 1. Перевірка чи існує користувач
@@ -50,22 +54,26 @@ async def register(
     # 2. Створення користувача
     new_user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         name=user_data.name,
         is_verified=False
     )
     db.add(new_user)
+    await bump_daily_stats(db, new_users=1)
     await db.commit()
     await db.refresh(new_user)
 
     # 3. Генерація даних для підтвердження
     code = str(random.randint(100000, 999999))
     token = str(uuid.uuid4())
-    verification_store[user_data.email] = {"code": code, "token": token, "type": "verify"}
+    await token_store.issue(
+        user_data.email, VERIFY, code, token,
+        ttl=timedelta(minutes=settings.VERIFY_CODE_TTL_MINUTES),
+    )
 
-    # 4. Відправка листа через BackgroundTasks (Фонове завдання)
-    # Це вирішує проблему затримок та "мовчазних" падінь під час реєстрації
-    tasks.add_task(send_verification_email, user_data.email, code, token)
+    # 4. Лист ставиться в email outbox, відправляє його фоновий воркер
+    # (з повторними спробами, не блокує реєстрацію)
+    await send_verification_email(db, user_data.email, code, token)
     
     return {"message": "Registration successful. Please check your email for verification code."}
 
@@ -74,10 +82,9 @@ class VerificationRequest(BaseModel):
     code: str
 
 @router.post("/verify-email")
-async def verify_email_code(data: VerificationRequest, db: AsyncSession = Depends(get_db)):
-    store_data = verification_store.get(data.email)
-    
-    if not store_data or store_data["code"] != data.code or store_data["type"] != "verify":
+async def verify_email_code(data: VerificationRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    await auth_limiter.check("verify-email", request, data.email)
+    if not await token_store.check_code(data.email, VERIFY, data.code):
         raise HTTPException(status_code=400, detail="Invalid or expired verification code")
     
     result = await db.execute(select(User).where(User.email == data.email))
@@ -90,42 +97,41 @@ async def verify_email_code(data: VerificationRequest, db: AsyncSession = Depend
     await db.commit()
     
     # Видаляємо код після успішної перевірки
-    del verification_store[data.email]
+    await token_store.consume(data.email, VERIFY)
     
-    access_token = create_access_token(subject=user.id)
-    return {"message": "Email verified", "access_token": access_token, "token_type": "bearer"}
+    tokens = await refresh_tokens.issue_token_pair(db, user.id)
+    return {"message": "Email verified", **tokens}
 
 @router.get("/verify-link")
 async def verify_magic_link(token: str, db: AsyncSession = Depends(get_db)):
-    email = None
-    for em, data in verification_store.items():
-        if data.get("token") == token and data.get("type") == "verify":
-            email = em
-            break
-            
-    if not email:
+    record = await token_store.get_by_token(token, VERIFY)
+    if not record:
         return RedirectResponse(url="/frontend/auth.html?error=invalid_token")
-        
+
+    email = record.email
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
     
     if user:
         user.is_verified = True
         await db.commit()
-        if email in verification_store:
-            del verification_store[email]
+        await token_store.consume(email, VERIFY)
         
-        access_token = create_access_token(subject=user.id)
-        return RedirectResponse(url=f"/frontend/dashboard.html#token={access_token}")
+        # No tokens in the URL (browser history): a short-lived one-time handoff
+        # that the page exchanges for a token pair via POST /api/auth/magic-login
+        handoff = str(uuid.uuid4())
+        await token_store.issue(email, LOGIN, "", handoff, timedelta(minutes=2))
+        return RedirectResponse(url=f"/frontend/dashboard.html#login={handoff}")
         
     return RedirectResponse(url="/frontend/auth.html?error=user_not_found")
 
 @router.post("/forgot-password")
 async def forgot_password(
     data: PasswordRecovery, 
-    tasks: BackgroundTasks, 
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
+    await auth_limiter.check("forgot-password", request, data.email)
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalars().first()
     
@@ -133,16 +139,18 @@ async def forgot_password(
         raise HTTPException(status_code=404, detail="User not found")
 
     code = str(random.randint(100000, 999999))
-    verification_store[data.email] = {"code": code, "type": "reset"}
+    await token_store.issue(
+        data.email, RESET, code, None,
+        ttl=timedelta(minutes=settings.RESET_CODE_TTL_MINUTES),
+    )
     
-    tasks.add_task(send_reset_email, data.email, code)
+    await send_reset_email(db, data.email, code)
     
     return {"message": "Password reset code sent"}
 
 @router.post("/reset-password")
 async def reset_password(data: PasswordReset, db: AsyncSession = Depends(get_db)):
-    stored = verification_store.get(data.email)
-    if not stored or stored["code"] != data.code or stored["type"] != "reset":
+    if not await token_store.check_code(data.email, RESET, data.code):
         raise HTTPException(status_code=400, detail="Invalid verification code")
     
     result = await db.execute(select(User).where(User.email == data.email))
@@ -151,29 +159,41 @@ async def reset_password(data: PasswordReset, db: AsyncSession = Depends(get_db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    user.password_hash = get_password_hash(data.new_password)
+    user.password_hash = await hash_password_async(data.new_password)
+    # Sign out every session that knew the old password
+    await refresh_tokens.revoke_user_tokens(db, user.id)
     await db.commit()
     
-    del verification_store[data.email]
+    await token_store.consume(data.email, RESET)
     return {"message": "Password updated successfully"}
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login(login_data: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
+    # Before the user lookup and bcrypt: bursts get cheap 429s
+    await auth_limiter.check("login", request, login_data.email)
     result = await db.execute(select(User).where(User.email == login_data.email))
     user = result.scalars().first()
 
-    if not user or not user.password_hash or not verify_password(login_data.password, user.password_hash):
+    if not user or not user.password_hash:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    valid, new_hash = await verify_password_async(login_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
         
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified. Please check your inbox.")
 
-    access_token = create_access_token(subject=user.id)
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Stored hash made with old cost settings: upgrade it now that we know the password
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
+    return await refresh_tokens.issue_token_pair(db, user.id)
 
 @router.post("/google", response_model=Token)
 async def google_login(login_data: GoogleLogin, db: AsyncSession = Depends(get_db)):
-    google_data = verify_google_token(login_data.token)
+    google_data = await verify_google_token(login_data.token)
     if not google_data:
         raise HTTPException(status_code=400, detail="Invalid Google token")
 
@@ -192,28 +212,68 @@ async def google_login(login_data: GoogleLogin, db: AsyncSession = Depends(get_d
             is_verified=True 
         )
         db.add(user)
+        await bump_daily_stats(db, new_users=1)
     else:
         user.google_id = google_id
         
     await db.commit()
     await db.refresh(user)
 
-    access_token = create_access_token(subject=user.id)
-    return {"access_token": access_token, "token_type": "bearer"}
+    return await refresh_tokens.issue_token_pair(db, user.id)
+
+@router.post("/magic-login", response_model=Token)
+async def magic_login(data: MagicLoginRequest, db: AsyncSession = Depends(get_db)):
+    record = await token_store.get_by_token(data.token, LOGIN)
+    if not record:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired login link")
+    await token_store.consume(record.email, LOGIN)
+
+    result = await db.execute(select(User).where(User.email == record.email))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired login link")
+    return await refresh_tokens.issue_token_pair(db, user.id)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        tokens = await refresh_tokens.rotate(db, data.refresh_token)
+    except refresh_tokens.TokenAlreadyRotated:
+        # Another tab refreshed first; the client picks up the pair it stored
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Refresh token already rotated",
+        )
+    if not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+    return tokens
+
+@router.post("/logout")
+async def logout(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    await refresh_tokens.revoke_token(db, data.refresh_token)
+    return {"message": "Logged out"}
+
+async def get_user_from_token(token: str, db: AsyncSession) -> User | None:
+    """Resolves a bearer token to its user, or None if the token is invalid"""
+    user_id = resolve_token(token)
+    if user_id is None:
+        return None
+    return await load_principal(user_id, db)
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    payload = decode_access_token(token)
-    if not payload:
+    user_id = resolve_token(token)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user_id = payload.get("sub")
-    
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-    
+
+    # Cached principal: no SELECT for repeat requests with the same token
+    user = await load_principal(user_id, db)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -225,13 +285,7 @@ async def get_current_user_optional(
     if not token:
         return None
     try:
-        payload = decode_access_token(token)
-        if not payload:
-            return None
-        user_id = payload.get("sub")
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
-        return user
+        return await get_user_from_token(token, db)
     except Exception:
         return None
 
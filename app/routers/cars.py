@@ -1,5 +1,7 @@
+import math
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -8,8 +10,14 @@ from app.models.car import Car, CarStatus
 from app.models.user import User, UserRole
 from app.models.rental import Rental, RentalStatus
 from datetime import datetime, timedelta
-from app.schemas.car import CarCreate, CarUpdate, CarResponse
+from app.schemas.car import (
+    CarCreate, CarUpdate, CarResponse, CarChangesResponse, CarSearchResponse
+)
 from app.routers.auth import get_current_user
+from app.services.changefeed import car_feed, publish_car_change, publish_car_deleted
+from app.services.pricing import invalidate_car_pricing
+from app.services import images
+from app.config import settings
 
 router = APIRouter(prefix="/api/cars", tags=["Cars"])
 
@@ -21,35 +29,29 @@ async def get_admin_user(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
-@router.get("/", response_model=List[CarResponse])
-async def read_cars(
-    status: Optional[CarStatus] = None, 
-    db: AsyncSession = Depends(get_db)
-):
-    query = select(Car)
-    if status:
-        query = query.where(Car.status == status)
-    result = await db.execute(query)
-    cars = result.scalars().all()
-    
-    # Process busy cars to find end time
-    # (Optimization: could be done with a join, but this is simpler for now)
-    car_responses = []
-    
+async def attach_rental_info(db: AsyncSession, cars):
+    """
+    Sets `busy_until` / `booked_by_name` on each car from its active rental.
+    Only rentals of the given cars are loaded.
+    """
+    if not cars:
+        return cars
+
     # Fetch active rentals with user info
     # We need to join/load User to get the name
     from sqlalchemy.orm import selectinload
-    active_rentals_query = select(Rental).options(selectinload(Rental.user)).where(Rental.status == RentalStatus.ACTIVE)
+    active_rentals_query = (
+        select(Rental)
+        .options(selectinload(Rental.user))
+        .where(Rental.status == RentalStatus.ACTIVE)
+        .where(Rental.car_id.in_([car.id for car in cars]))
+    )
     rentals_res = await db.execute(active_rentals_query)
     active_rentals = rentals_res.scalars().all()
     # Normalize keys to string to avoid UUID vs str mismatch issues
     rental_map = {str(r.car_id): r for r in active_rentals}
 
     for car in cars:
-        # Clone to not mutate db object if session is open (though here it's fine)
-        # We need to return an object that matches CarResponse
-        # Since CarResponse is Pydantic, we can pass a dict or object
-        
         busy_until = None
         booked_by_name = None
         
@@ -62,14 +64,133 @@ async def read_cars(
             if rental.user:
                 booked_by_name = rental.user.name or "User"
         
-        # Determine if we can just set the attribute on the ORM object temporarily
-        # Python allows setting arbitrary attributes on instances
+        # Python allows setting arbitrary attributes on instances,
+        # CarResponse picks them up via from_attributes
         setattr(car, 'busy_until', busy_until)
         setattr(car, 'booked_by_name', booked_by_name)
-        # Or we can let Pydantic handle it if the attribute exists
         
     return cars
 
+@router.get("/", response_model=List[CarResponse])
+async def read_cars(
+    status: Optional[CarStatus] = None, 
+    db: AsyncSession = Depends(get_db)
+):
+    query = select(Car)
+    if status:
+        query = query.where(Car.status == status)
+    result = await db.execute(query)
+    cars = result.scalars().all()
+    return await attach_rental_info(db, cars)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+@router.get("/search", response_model=CarSearchResponse)
+async def search_cars(
+    track: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    status: Optional[CarStatus] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_battery: Optional[int] = Query(None, ge=0, le=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Filtered, paginated car search.
+    With `lat`/`lon` results are ordered by distance; `radius_km` limits them
+    (bounding-box prefilter on the lat/lon index, then exact haversine).
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be given together")
+    if radius_km is not None and lat is None:
+        raise HTTPException(status_code=400, detail="radius_km requires lat and lon")
+
+    filters = []
+    if track:
+        filters.append(Car.track == track)
+    if status:
+        filters.append(Car.status == status)
+    if min_price is not None:
+        filters.append(Car.price_per_minute >= min_price)
+    if max_price is not None:
+        filters.append(Car.price_per_minute <= max_price)
+    if min_battery is not None:
+        filters.append(Car.battery_level >= min_battery)
+
+    distance = None
+    if lat is not None:
+        # Haversine distance in km
+        d_lat = func.radians(Car.latitude - lat) / 2
+        d_lon = func.radians(Car.longitude - lon) / 2
+        a = (
+            func.power(func.sin(d_lat), 2)
+            + math.cos(math.radians(lat)) * func.cos(func.radians(Car.latitude)) * func.power(func.sin(d_lon), 2)
+        )
+        distance = (2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))).label("distance_km")
+        filters.append(Car.latitude.is_not(None))
+
+        if radius_km is not None:
+            lat_delta = radius_km / KM_PER_DEGREE
+            lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+            filters.append(Car.latitude.between(lat - lat_delta, lat + lat_delta))
+            filters.append(Car.longitude.between(lon - lon_delta, lon + lon_delta))
+            filters.append(distance <= radius_km)
+
+    total_result = await db.execute(select(func.count(Car.id)).where(*filters))
+    total = total_result.scalar() or 0
+
+    if distance is not None:
+        query = select(Car, distance).where(*filters).order_by(distance, Car.id)
+    else:
+        query = select(Car).where(*filters).order_by(Car.name, Car.id)
+    result = await db.execute(query.offset(offset).limit(limit))
+
+    if distance is not None:
+        rows = result.all()
+        cars = [row[0] for row in rows]
+        for car, dist in rows:
+            setattr(car, 'distance_km', round(dist, 3) if dist is not None else None)
+    else:
+        cars = result.scalars().all()
+
+    await attach_rental_info(db, cars)
+    return CarSearchResponse(items=cars, total=total, limit=limit, offset=offset)
+
+@router.get("/changes", response_model=CarChangesResponse)
+async def read_car_changes(
+    since: int = 0,
+    epoch: Optional[str] = None,
+    wait: int = 0,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Changefeed over car state.
+    Returns changes after `since`; with `wait` > 0 it long-polls for up to
+    that many seconds. If `since` is outside the retention window (or `epoch`
+    is from a previous server run) the response has `reset=true` and a full
+    snapshot in `cars`.
+    """
+    wait = max(0, min(wait, settings.CHANGEFEED_MAX_WAIT_SECONDS))
+    if wait:
+        changes = await car_feed.wait(since, epoch, timeout=wait)
+    else:
+        changes = car_feed.since(since, epoch)
+
+    if changes is not None:
+        seq = changes[-1]["seq"] if changes else max(since, 0)
+        return CarChangesResponse(epoch=car_feed.epoch, seq=seq, changes=changes)
+
+    # Take the sequence before reading, so changes racing the snapshot get replayed
+    seq = car_feed.last_seq
+    result = await db.execute(select(Car))
+    cars = await attach_rental_info(db, result.scalars().all())
+    return CarChangesResponse(epoch=car_feed.epoch, seq=seq, reset=True, cars=cars)
+
 @router.get("/{car_id}", response_model=CarResponse)
 async def read_car(car_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Car).where(Car.id == car_id))
@@ -90,9 +211,15 @@ async def create_car(
         raise HTTPException(status_code=400, detail="Car with this Raspberry ID already exists")
 
     new_car = Car(**car_data.dict())
+    # Variants of an upload rendered before the car was saved
+    new_car.image_variants = await images.load_variants(new_car.image_url)
     db.add(new_car)
     await db.commit()
     await db.refresh(new_car)
+    if new_car.image_url and new_car.image_variants is None:
+        # Not rendered yet (render still running or failed): fills the row once done
+        images.schedule_variants(new_car.image_url, images.CAR)
+    await publish_car_change(new_car)
     return new_car
 
 @router.put("/{car_id}", response_model=CarResponse)
@@ -110,9 +237,19 @@ async def update_car(
     update_data = car_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(car, key, value)
+    if "image_url" in update_data:
+        car.image_variants = await images.load_variants(car.image_url)
     
     await db.commit()
     await db.refresh(car)
+    if "image_url" in update_data and car.image_url and car.image_variants is None:
+        images.schedule_variants(car.image_url, images.CAR)
+
+    if "price_per_minute" in update_data:
+        invalidate_car_pricing(car.id)
+
+    await attach_rental_info(db, [car])
+    await publish_car_change(car)
     return car
 
 @router.delete("/{car_id}")
@@ -128,4 +265,6 @@ async def delete_car(
     
     await db.delete(car)
     await db.commit()
+    invalidate_car_pricing(car.id)
+    await publish_car_deleted(car.id)
     return {"message": "Car deleted successfully"}
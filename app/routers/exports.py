@@ -0,0 +1,224 @@
+"""
+Streaming admin exports (CSV / NDJSON) for rentals, transactions and support tickets.
+
+Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE and
+written to the response as they arrive, so memory stays flat whatever the
+row count. Exports use their own tiny connection pool (EXPORT_POOL_SIZE) and
+run one at a time per worker, yielding to the event loop between batches, so
+they never compete with rental traffic for connections.
+"""
+import asyncio
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import text
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import ExportSessionLocal
+from app.models.car import Car
+from app.models.rental import Rental
+from app.models.support import SupportTicket
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.routers.auth import get_admin_user
+
+router = APIRouter(prefix="/api/admin/exports", tags=["Admin"])
+
+
+class _ExportSlot:
+    """
+    One export at a time per worker. Claimed and checked in a single step
+    (no await in between), and released through the claim it was taken with,
+    so a late release of a finished export can't free a newer one.
+    """
+
+    def __init__(self):
+        self._owner: Optional[object] = None
+
+    def try_claim(self) -> Optional[object]:
+        if self._owner is not None:
+            return None
+        self._owner = object()
+        return self._owner
+
+    def release(self, claim: object):
+        if self._owner is claim:
+            self._owner = None
+
+
+_export_slot = _ExportSlot()
+
+RENTAL_COLUMNS = [
+    "id", "user_id", "user_email", "car_id", "car_name", "started_at", "ended_at",
+    "duration_minutes", "extended_minutes", "status", "rating", "issue_report", "feedback",
+]
+TRANSACTION_COLUMNS = [
+    "id", "user_id", "user_email", "amount_uah", "minutes_added", "liqpay_order_id", "status", "created_at",
+]
+TICKET_COLUMNS = ["id", "user_id", "email", "subject", "message", "status", "created_at"]
+
+
+def _value(v):
+    if v is None:
+        return None
+    if hasattr(v, "value"):  # Enums
+        return v.value
+    if isinstance(v, (datetime, uuid.UUID)):
+        return v.isoformat() if isinstance(v, datetime) else str(v)
+    if isinstance(v, (int, float, str, bool)):
+        return v
+    return str(v)  # Decimal
+
+
+def _csv_value(v):
+    v = _value(v)
+    # Spreadsheets run cells starting with these as formulas
+    if isinstance(v, str) and v.startswith(("=", "+", "-", "@")):
+        return "'" + v
+    return v
+
+
+def _rentals_query(date_from, date_to, car_id, user_id):
+    query = (
+        select(
+            Rental.id, Rental.user_id, User.email.label("user_email"), Rental.car_id, Car.name.label("car_name"),
+            Rental.started_at, Rental.ended_at, Rental.duration_minutes, Rental.extended_minutes,
+            Rental.status, Rental.rating, Rental.issue_report, Rental.feedback,
+        )
+        .join(User, User.id == Rental.user_id)
+        .join(Car, Car.id == Rental.car_id)
+        .order_by(Rental.started_at, Rental.id)
+    )
+    if date_from:
+        query = query.where(Rental.started_at >= date_from)
+    if date_to:
+        query = query.where(Rental.started_at < date_to)
+    if car_id:
+        query = query.where(Rental.car_id == car_id)
+    if user_id:
+        query = query.where(Rental.user_id == user_id)
+    return query
+
+
+def _transactions_query(date_from, date_to, user_id):
+    query = (
+        select(
+            Transaction.id, Transaction.user_id, User.email.label("user_email"), Transaction.amount_uah,
+            Transaction.minutes_added, Transaction.liqpay_order_id, Transaction.status, Transaction.created_at,
+        )
+        .join(User, User.id == Transaction.user_id)
+        .order_by(Transaction.created_at, Transaction.id)
+    )
+    if date_from:
+        query = query.where(Transaction.created_at >= date_from)
+    if date_to:
+        query = query.where(Transaction.created_at < date_to)
+    if user_id:
+        query = query.where(Transaction.user_id == user_id)
+    return query
+
+
+def _tickets_query(date_from, date_to, user_id):
+    query = select(
+        SupportTicket.id, SupportTicket.user_id, SupportTicket.email, SupportTicket.subject,
+        SupportTicket.message, SupportTicket.status, SupportTicket.created_at,
+    ).order_by(SupportTicket.created_at, SupportTicket.id)
+    if date_from:
+        query = query.where(SupportTicket.created_at >= date_from)
+    if date_to:
+        query = query.where(SupportTicket.created_at < date_to)
+    if user_id:
+        query = query.where(SupportTicket.user_id == user_id)
+    return query
+
+
+async def _stream_rows(query, columns, fmt, claim):
+    try:
+        async with ExportSessionLocal() as db:
+            # Read-only snapshot; nothing here should ever block writers
+            await db.execute(text("SET TRANSACTION READ ONLY"))
+            result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield buffer.getvalue()
+
+            async for batch in result.partitions():
+                if fmt == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows([_csv_value(v) for v in row] for row in batch)
+                    chunk = buffer.getvalue()
+                else:
+                    chunk = "".join(
+                        json.dumps(dict(zip(columns, (_value(v) for v in row))), ensure_ascii=False) + "\n"
+                        for row in batch
+                    )
+                yield chunk
+                # Let request handlers run between batches
+                await asyncio.sleep(0)
+    finally:
+        _export_slot.release(claim)
+
+
+async def _start_export(name, query, columns, fmt):
+    claim = _export_slot.try_claim()
+    if claim is None:
+        raise HTTPException(status_code=409, detail="Another export is running, try again shortly")
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"{name}_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}"
+    return StreamingResponse(
+        _stream_rows(query, columns, fmt, claim),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        # Also frees the slot if the client left before the stream started
+        background=BackgroundTask(_export_slot.release, claim),
+    )
+
+
+@router.get("/rentals")
+async def export_rentals(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    car_id: Optional[uuid.UUID] = None,
+    user_id: Optional[uuid.UUID] = None,
+    admin: User = Depends(get_admin_user)
+):
+    query = _rentals_query(date_from, date_to, car_id, user_id)
+    return await _start_export("rentals", query, RENTAL_COLUMNS, format)
+
+
+@router.get("/transactions")
+async def export_transactions(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    user_id: Optional[uuid.UUID] = None,
+    admin: User = Depends(get_admin_user)
+):
+    query = _transactions_query(date_from, date_to, user_id)
+    return await _start_export("transactions", query, TRANSACTION_COLUMNS, format)
+
+
+@router.get("/tickets")
+async def export_tickets(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    user_id: Optional[uuid.UUID] = None,
+    admin: User = Depends(get_admin_user)
+):
+    query = _tickets_query(date_from, date_to, user_id)
+    return await _start_export("tickets", query, TICKET_COLUMNS, format)
@@ -1,9 +1,13 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from uuid import uuid4
-from decimal import Decimal
+from sqlalchemy import tuple_
+from uuid import UUID, uuid4
+from datetime import datetime
+from typing import Optional
+import base64
+import json
 
 from app.database import get_db
 from app.models.transaction import Transaction, TransactionStatus
@@ -11,6 +15,8 @@ from app.models.user import User
 from app.routers.auth import get_current_user
 from app.utils.liqpay import liqpay
 from app.config import settings
+from app.services import payment_inbox, payments
+from app.schemas.transaction import TransactionItem, PaymentHistoryPage
 
 # Setup logging
 logger = logging.getLogger("payments")
@@ -44,6 +50,7 @@ async def create_payment(
     )
     db.add(transaction)
     await db.commit()
+    payments.invalidate_history(current_user.id)
     
     result_url = f"{APP_URL}/frontend/dashboard.html?payment=success"
     logger.info(f"Payment create: result_url={result_url}")
@@ -66,7 +73,10 @@ async def liqpay_callback(
     signature: str = Form(...), 
     db: AsyncSession = Depends(get_db)
 ):
-    """LiqPay webhook callback for processing payment results"""
+    """
+    LiqPay webhook callback. Verified results are stored in the payment inbox
+    and applied by a background worker, so LiqPay gets its answer right away.
+    """
     
     # Verify signature
     if not liqpay.verify_signature(data, signature):
@@ -80,44 +90,60 @@ async def liqpay_callback(
     
     logger.info(f"LiqPay callback: order_id={order_id}, status={status}, amount={amount}")
     
-    # Find transaction
-    result = await db.execute(select(Transaction).where(Transaction.liqpay_order_id == order_id))
-    transaction = result.scalars().first()
-    
-    if not transaction:
-        logger.error(f"LiqPay callback: Transaction not found for order_id={order_id}")
-        return {"status": "error", "message": "Transaction not found"}
-        
-    if transaction.status == TransactionStatus.SUCCESS:
-        logger.info(f"LiqPay callback: Transaction {order_id} already processed")
-        return {"status": "already_processed"}
+    if not order_id or not status:
+        raise HTTPException(status_code=400, detail="Missing order_id or status")
 
-    if status == "success" or status == "sandbox":
-        transaction.status = TransactionStatus.SUCCESS
-        
-        # Add balance to user
-        result_user = await db.execute(select(User).where(User.id == transaction.user_id))
-        user = result_user.scalars().first()
-        if user:
-            old_balance = user.balance
-            user.balance += Decimal(str(transaction.amount_uah)) # Update Money Balance
-            # user.balance_minutes += transaction.minutes_added # Optional: decide if we keep minutes logic
-            logger.info(
-                f"LiqPay callback: SUCCESS - User {user.email} balance updated: "
-                f"{old_balance} -> {user.balance} (+{transaction.amount_uah} UAH)"
-            )
-    else:
-        transaction.status = TransactionStatus.FAILED
-        logger.warning(f"LiqPay callback: FAILED - order_id={order_id}, status={status}")
-    
-    await db.commit()
-    return {"status": "ok"}
+    await payment_inbox.enqueue(db, decoded_data)
+    return {"status": "accepted"}
+
+def _encode_cursor(created_at: datetime, transaction_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(transaction_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.fromisoformat(created_at), UUID(transaction_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.get("/history")
+@router.get("/history", response_model=PaymentHistoryPage)
 async def get_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(select(Transaction).where(Transaction.user_id == current_user.id).order_by(Transaction.created_at.desc()))
-    transactions = result.scalars().all()
-    return transactions
+    """Newest first, keyset-paginated; served from ix_transactions_user_created alone"""
+    user_key = str(current_user.id)
+    if cursor is None:
+        cached = payments.history_cache.get(user_key)
+        if cached is not None and limit in cached:
+            return cached[limit]
+
+    query = (
+        select(
+            Transaction.id, Transaction.amount_uah, Transaction.minutes_added,
+            Transaction.status, Transaction.created_at,
+        )
+        .where(Transaction.user_id == current_user.id)
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, transaction_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Transaction.created_at, Transaction.id) < tuple_(created_at, transaction_id))
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = PaymentHistoryPage(
+        items=[TransactionItem.model_validate(row) for row in rows],
+        next_cursor=_encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    )
+    if cursor is None:
+        pages = payments.history_cache.get(user_key) or {}
+        pages[limit] = page
+        payments.history_cache.set(user_key, pages)
+    return page
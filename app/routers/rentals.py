@@ -9,13 +9,35 @@ from app.database import get_db
 from app.models.rental import Rental, RentalStatus
 from app.models.car import Car, CarStatus
 from app.models.user import User
-from app.schemas.rental import RentalCreate, RentalResponse, RentalExtend
+from app.schemas.rental import RentalCreate, RentalResponse, RentalExtend, RentalQuote
 from app.routers.auth import get_current_user
 from app.websocket.manager import manager
+from app.services.changefeed import publish_car_change
+from app.services.pricing import quote_rental, PricingError
+from app.services.rollups import bump_daily_stats
+from app.services.analytics import record_rental_sale
 
 router = APIRouter(prefix="/api/rentals", tags=["Rentals"])
 
-from decimal import Decimal
+async def _quote_or_400(db: AsyncSession, car: Car, minutes: int):
+    try:
+        return await quote_rental(db, car, minutes)
+    except PricingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/quote", response_model=RentalQuote)
+async def get_rental_quote(
+    car_id: str,
+    minutes: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Price for renting a car for `minutes`, using the best tariff packages"""
+    result = await db.execute(select(Car).where(Car.id == car_id))
+    car = result.scalars().first()
+    if not car:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    return await _quote_or_400(db, car, minutes)
 
 @router.post("/start", response_model=RentalResponse)
 async def start_rental(
@@ -32,13 +54,12 @@ async def start_rental(
     if car.status != CarStatus.FREE:
         raise HTTPException(status_code=409, detail="Car is not available")
 
-    # 2. Calculate Cost (UAH)
-    # Use Decimal for financial calculations
-    price_per_minute = Decimal(str(car.price_per_minute))
-    duration_decimal = Decimal(str(rental_data.duration_minutes))
-    total_cost = price_per_minute * duration_decimal
+    # 2. Calculate Cost (UAH) from the car's price table (tariff packages + per-minute)
+    quote = await _quote_or_400(db, car, rental_data.duration_minutes)
+    total_cost = quote.total
     
-    # 3. Check Balance (UAH)
+    # 3. Check Balance (UAH) - re-read under a row lock, the principal may be a cached snapshot
+    await db.refresh(current_user, attribute_names=["balance"], with_for_update=True)
     user_balance = current_user.balance # Already Decimal
     if user_balance < total_cost:
         raise HTTPException(status_code=402, detail=f"Insufficient funds. Required: {total_cost} UAH, Available: {user_balance} UAH")
@@ -47,7 +68,8 @@ async def start_rental(
     new_rental = Rental(
         user_id=current_user.id,
         car_id=car.id,
-        duration_minutes=rental_data.duration_minutes
+        duration_minutes=rental_data.duration_minutes,
+        cost_uah=total_cost
     )
     
     # 5. Update Car Status
@@ -57,6 +79,8 @@ async def start_rental(
     current_user.balance -= total_cost 
     
     db.add(new_rental)
+    await bump_daily_stats(db, rentals_started=1)
+    await record_rental_sale(db, car.id, current_user.id, rental_data.duration_minutes, total_cost, new_rental=True)
     await db.commit()
     
     # Refresh to get ID and relationships populated
@@ -70,6 +94,7 @@ async def start_rental(
     
     # Broadcast update (Safe execution)
     try:
+        await publish_car_change(car, new_rental, current_user.name or "User")
         await manager.broadcast_status_update()
         
         # Start Video Stream on Car
@@ -121,6 +146,8 @@ async def get_active_rental(
             await db.commit()
             
             # Broadcast
+            if car:
+                await publish_car_change(car)
             await manager.broadcast_status_update()
             
             return None # No active rental anymore
@@ -159,6 +186,8 @@ async def stop_rental(
     await db.refresh(rental)
     
     # Broadcast update
+    if car:
+        await publish_car_change(car)
     await manager.broadcast_status_update()
     
     # Disconnect controller if active
@@ -190,10 +219,11 @@ async def extend_rental(
          raise HTTPException(status_code=404, detail="Car associated with rental not found")
 
     # 2. Calculate Cost (UAH)
-    price_per_minute = Decimal(str(car.price_per_minute))
-    cost = price_per_minute * Decimal(str(extend_data.additional_minutes))
+    quote = await _quote_or_400(db, car, extend_data.additional_minutes)
+    cost = quote.total
     
     # 3. Check Balance (UAH)
+    await db.refresh(current_user, attribute_names=["balance"], with_for_update=True)
     user_balance = current_user.balance
     if user_balance < cost:
         raise HTTPException(status_code=402, detail=f"Insufficient funds. Required: {cost} UAH, Available: {user_balance} UAH")
@@ -202,6 +232,8 @@ async def extend_rental(
     current_user.balance -= cost
     rental.extended_minutes += extend_data.additional_minutes
     rental.duration_minutes += extend_data.additional_minutes
+    rental.cost_uah = (rental.cost_uah or 0) + cost
+    await record_rental_sale(db, car.id, current_user.id, extend_data.additional_minutes, cost, new_rental=False)
     
     await db.commit()
     
@@ -215,6 +247,7 @@ async def extend_rental(
     
     # Broadcast status update
     try:
+        await publish_car_change(car, rental, current_user.name or "User")
         await manager.broadcast_status_update()
     except Exception as e:
         print(f"⚠️ Failed to broadcast update: {e}")
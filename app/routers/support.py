@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
@@ -76,7 +76,6 @@ async def update_ticket_status(
 async def reply_ticket(
     ticket_id: str,
     reply_data: SupportTicketReply,
-    tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_admin_user)
 ):
@@ -99,7 +98,7 @@ async def reply_ticket(
         raise HTTPException(status_code=400, detail="No email address associated with this ticket")
 
     # Send email
-    tasks.add_task(send_support_reply_email, recipient_email, ticket.subject, reply_data.message)
+    await send_support_reply_email(db, recipient_email, ticket.subject, reply_data.message)
     
     return {"message": "Reply sent successfully"}
 
@@ -1,21 +1,96 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import FileResponse
+import asyncio
+import hashlib
 import os
-import uuid
 from pathlib import Path
+from typing import BinaryIO
 from app.models.user import User, UserRole
 from app.routers.auth import get_current_user
 from app.database import get_db
+from app.services import images, upload_gc
+from app.services.storage import storage
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/api/uploads", tags=["Uploads"])
 
-# Directory for car images
-UPLOAD_DIR = Path("frontend/uploads/cars")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Storage prefixes (frontend/uploads/<prefix>/ with the local backend)
+CARS_PREFIX = "cars"
+AVATARS_PREFIX = "avatars"
 
 ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+CHUNK_SIZE = 64 * 1024
+
+def detect_image_type(head: bytes) -> str | None:
+    """Extension for the file's actual format (by magic bytes), or None"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+def _check_extension(filename: str | None):
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File type not allowed. Use: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+def _write_chunk(f: BinaryIO, digest, chunk: bytes):
+    f.write(chunk)
+    digest.update(chunk)
+
+def _finish_file(f: BinaryIO):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+def _discard_file(f: BinaryIO, tmp_path: str):
+    f.close()
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+async def save_upload(file: UploadFile, prefix: str) -> str:
+    """
+    Streams an uploaded image into storage and returns its public URL.
+    The size limit is enforced while reading, the format is checked by magic
+    bytes, and disk writes and hashing run in a thread. The blob is keyed
+    by content (`prefix/sha256.ext`), so a repeated upload reuses the
+    stored file instead of adding a copy.
+    """
+    _check_extension(file.filename)
+
+    fd, tmp_path = storage.staging_file()
+    f = os.fdopen(fd, "wb")
+    try:
+        first = await file.read(CHUNK_SIZE)
+        ext = detect_image_type(first)
+        if ext is None:
+            raise HTTPException(status_code=400, detail="File is not a PNG, JPEG or WebP image")
+
+        digest = hashlib.sha256()
+        size = 0
+        chunk = first
+        while chunk:
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=400, detail="File too large. Max 10MB.")
+            await asyncio.to_thread(_write_chunk, f, digest, chunk)
+            chunk = await file.read(CHUNK_SIZE)
+
+        await asyncio.to_thread(_finish_file, f)
+        key = f"{prefix}/{digest.hexdigest()}{ext}"
+        await storage.put(tmp_path, key)
+        return storage.url(key)
+    except BaseException:
+        await asyncio.to_thread(_discard_file, f, tmp_path)
+        raise
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
@@ -29,48 +104,29 @@ async def upload_car_image(
 ):
     """Upload a car image (PNG recommended for transparency)"""
     
-    # Validate file extension
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Use: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Read and check file size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Max 10MB.")
-    
-    # Generate unique filename
-    filename = f"{uuid.uuid4()}{ext}"
-    file_path = UPLOAD_DIR / filename
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
-    
-    # Return URL path (with /frontend prefix for static serving)
-    url = f"/frontend/uploads/cars/{filename}"
-    return {"url": url, "filename": filename}
+    # Stored under its content hash; the URL includes the /frontend static prefix
+    url = await save_upload(file, CARS_PREFIX)
+    images.schedule_variants(url, images.CAR)
+    return {"url": url, "filename": url.rsplit("/", 1)[1]}
 
 @router.delete("/car-image/{filename}")
 async def delete_car_image(
     filename: str,
     admin: User = Depends(get_admin_user)
 ):
-    """Delete a car image"""
-    file_path = UPLOAD_DIR / filename
-    
-    if not file_path.exists():
+    """Delete a car image (unused images are also removed by the upload GC)"""
+    if Path(filename).name != filename:
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    key = f"{CARS_PREFIX}/{filename}"
+
+    # Identical uploads share one file, so another car may still show it
+    if await upload_gc.is_referenced(storage.url(key)):
+        raise HTTPException(status_code=409, detail="Image is still used by a car")
+    if not await upload_gc.delete_blob(key):
         raise HTTPException(status_code=404, detail="File not found")
-    
-    os.remove(file_path)
     return {"message": "Image deleted"}
 
 # Avatar Uploads
-AVATAR_DIR = Path("frontend/uploads/avatars")
-AVATAR_DIR.mkdir(parents=True, exist_ok=True)
 
 @router.post("/avatar")
 async def upload_avatar(
@@ -79,32 +135,15 @@ async def upload_avatar(
     db: AsyncSession = Depends(get_db) # Need DB to update user
 ):
     """Upload user avatar"""
-    # Validate file extension
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Use: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Check size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Max 10MB.")
-    
-    # Generate filename with user ID to prevent clutter (or just uuid)
-    # Using uuid to avoid caching issues if we just used user_id.png
-    filename = f"{current_user.id}_{uuid.uuid4()}{ext}"
-    file_path = AVATAR_DIR / filename
-    
-    # Save
-    with open(file_path, "wb") as f:
-        f.write(contents)
-        
+    # Content-addressed URL: a new picture gets a new URL, so no cache busting is needed.
+    # The previous avatar is left to the upload GC.
+    url = await save_upload(file, AVATARS_PREFIX)
+
     # Update User Profile
-    url = f"/frontend/uploads/avatars/{filename}"
     current_user.avatar_url = url
+    current_user.avatar_variants = None  # Set once the new avatar's variants are rendered
     await db.commit()
     await db.refresh(current_user)
+    images.schedule_variants(url, images.AVATAR)
     
     return {"url": url}
@@ -1,9 +1,18 @@
+import asyncio
+import json
+import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.websocket.manager import manager
 from app.models.car import Car
+from app.services.changefeed import car_feed, publish_car_change
+from app.schemas.car import CarResponse
+from app.routers.cars import attach_rental_info
+from app.routers.admin import load_fleet
+from app.routers.auth import get_user_from_token
+from app.models.user import UserRole
 
 router = APIRouter(prefix="/api", tags=["Websockets"])
 
@@ -24,9 +33,15 @@ async def car_websocket(raspberry_id: str, websocket: WebSocket, db: AsyncSessio
                     result = await db.execute(select(Car).where(Car.raspberry_id == raspberry_id))
                     car = result.scalars().first()
                     if car:
-                        car.battery_level = data.get("battery", 0)
+                        new_battery = data.get("battery", 0)
+                        changed = car.battery_level != new_battery
+                        car.battery_level = new_battery
                         # Could store RSSI too if model supported it
                         await db.commit()
+
+                        if changed:
+                            await attach_rental_info(db, [car])
+                            await publish_car_change(car)
                         
                         # Broadcast optimized update?
                         # For now, general broadcast handles it (it fetches all cars)
@@ -44,12 +59,49 @@ async def car_websocket(raspberry_id: str, websocket: WebSocket, db: AsyncSessio
         manager.disconnect_car(raspberry_id)
         await manager.broadcast_status_update()
 
+async def _send_car_changes(websocket: WebSocket, since: int, epoch: str | None):
+    """Answers a `resume` request: missed changes, or a snapshot if they are gone."""
+    changes = car_feed.since(since, epoch)
+    if changes is not None:
+        await websocket.send_text(json.dumps({
+            "type": "car_changes",
+            "epoch": car_feed.epoch,
+            "seq": changes[-1]["seq"] if changes else since,
+            "changes": changes,
+        }))
+        return
+
+    seq = car_feed.last_seq
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Car))
+        cars = await attach_rental_info(db, result.scalars().all())
+        snapshot = [CarResponse.model_validate(car).model_dump(mode="json") for car in cars]
+
+    await websocket.send_text(json.dumps({
+        "type": "car_snapshot",
+        "epoch": car_feed.epoch,
+        "seq": seq,
+        "cars": snapshot,
+    }))
+
 @router.websocket("/ws/status")
 async def status_websocket(websocket: WebSocket):
     await manager.connect_user_observer(websocket)
     try:
         while True:
-            await websocket.receive_text() # Just keep alive
+            # Mostly keep-alive; clients may also send
+            # {"type": "resume", "since": <seq>, "epoch": "<epoch>"} after reconnecting
+            text = await websocket.receive_text()
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and data.get("type") == "resume":
+                try:
+                    since = int(data.get("since") or 0)
+                except (TypeError, ValueError):
+                    since = 0
+                await _send_car_changes(websocket, since, data.get("epoch"))
     except WebSocketDisconnect:
         manager.disconnect_user_observer(websocket)
 
@@ -76,3 +128,62 @@ async def control_websocket(car_id: str, websocket: WebSocket, db: AsyncSession
                 await websocket.send_text("Car offline")
     except WebSocketDisconnect:
         manager.disconnect_user_controller(car.id)
+
+async def _push_fleet(websocket: WebSocket):
+    """Sends the fleet once, then only the cars touched by each changefeed event"""
+    seq, epoch = None, None
+    while True:
+        if seq is None:
+            changes = None
+        elif seq == 0:
+            # Snapshot was taken before anything was published; resync on the first event
+            changes = None if await car_feed.wait_next(timeout=30) else []
+        else:
+            changes = await car_feed.wait(seq, epoch, timeout=30)
+        if changes == []:
+            continue
+
+        async with AsyncSessionLocal() as db:
+            if changes is None:
+                epoch, seq = car_feed.epoch, car_feed.last_seq
+                fleet = await load_fleet(db)
+                message = {"type": "fleet_snapshot", "seq": seq, "cars": fleet}
+            else:
+                seq = changes[-1]["seq"]
+                car_ids = {e["car_id"] for e in changes}
+                removed = sorted(e["car_id"] for e in changes if e["state"].get("deleted"))
+                fleet = await load_fleet(db, [uuid.UUID(c) for c in car_ids - set(removed)])
+                message = {"type": "fleet_update", "seq": seq, "cars": fleet, "removed": removed}
+
+        message["cars"] = [car.model_dump(mode="json") for car in message["cars"]]
+        await websocket.send_text(json.dumps(message))
+
+async def _receive_until_disconnect(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()  # Keep alive, detect disconnects
+    except WebSocketDisconnect:
+        pass
+
+@router.websocket("/ws/admin/fleet")
+async def admin_fleet_websocket(websocket: WebSocket, token: str):
+    """Live admin fleet view, pushed from rental and telemetry changes instead of polling"""
+    async with AsyncSessionLocal() as db:
+        user = await get_user_from_token(token, db)
+    if not user or user.role != UserRole.ADMIN:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    receiver = asyncio.create_task(_receive_until_disconnect(websocket))
+    pusher = asyncio.create_task(_push_fleet(websocket))
+    # Tear down when either side ends: a dead pusher must not leave a silent, open socket
+    done, pending = await asyncio.wait({receiver, pusher}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if pusher in done and not pusher.cancelled() and pusher.exception():
+        print(f"❌ Admin Fleet WebSocket Error: {pusher.exception()!r}")
+        try:
+            await websocket.close(code=1011)  # The page reconnects and gets a fresh snapshot
+        except Exception:
+            pass
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 from app.models.car import CarStatus
@@ -9,6 +9,9 @@ class CarBase(BaseModel):
     raspberry_id: str
     vdo_ninja_id: Optional[str] = None
     location: Optional[str] = None
+    track: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     description: Optional[str] = None
     image_url: Optional[str] = None
     price_per_minute: Optional[float] = 1.00  # UAH per minute
@@ -21,6 +24,9 @@ class CarUpdate(BaseModel):
     status: Optional[CarStatus] = None
     vdo_ninja_id: Optional[str] = None
     location: Optional[str] = None
+    track: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     description: Optional[str] = None
     image_url: Optional[str] = None
     price_per_minute: Optional[float] = None
@@ -31,6 +37,7 @@ class CarResponse(CarBase):
     status: CarStatus
     battery_level: int
     image_url: Optional[str] = None
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None  # {format: {width: url}}
     price_per_minute: float = 1.00
     busy_until: Optional[datetime] = None
     booked_by_name: Optional[str] = None
@@ -38,3 +45,24 @@ class CarResponse(CarBase):
     
     class Config:
         from_attributes = True
+
+class CarChangeEvent(BaseModel):
+    seq: int
+    car_id: str
+    state: dict
+
+class CarChangesResponse(BaseModel):
+    epoch: str
+    seq: int  # Pass this back as `since` on the next call
+    reset: bool = False  # True when `since` was outside the retention window
+    changes: List[CarChangeEvent] = []
+    cars: Optional[List[CarResponse]] = None  # Full snapshot, only sent on reset
+
+class CarSearchResult(CarResponse):
+    distance_km: Optional[float] = None  # Only set when searching by coordinates
+
+class CarSearchResponse(BaseModel):
+    items: List[CarSearchResult]
+    total: int
+    limit: int
+    offset: int
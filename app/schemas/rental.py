@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from app.models.rental import RentalStatus
@@ -49,3 +49,19 @@ class RentalFeedback(BaseModel):
     rental_id: UUID
     rating: int
     comment: Optional[str] = None
+
+class QuotePackage(BaseModel):
+    id: UUID
+    name: str
+    duration_minutes: int
+    price: float
+    count: int
+
+class RentalQuote(BaseModel):
+    car_id: UUID
+    minutes: int
+    total: float  # UAH
+    per_minute_price: float
+    per_minute_minutes: int  # Minutes not covered by packages
+    packages: List[QuotePackage] = []
+    savings: float = 0.0  # Compared to paying everything per minute
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+from app.models.transaction import TransactionStatus
+
+class TransactionItem(BaseModel):
+    id: UUID
+    amount_uah: Decimal
+    minutes_added: int
+    status: TransactionStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class PaymentHistoryPage(BaseModel):
+    items: List[TransactionItem]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next (older) page
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import Dict, Optional
 from uuid import UUID
 from datetime import datetime
 from app.models.user import UserRole
@@ -29,10 +29,18 @@ class GoogleLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class MagicLoginRequest(BaseModel):
+    token: str
 
 class UserResponse(UserBase):
     id: UUID
     avatar_url: Optional[str] = None
+    avatar_variants: Optional[Dict[str, Dict[str, str]]] = None  # {format: {width: url}}
     balance_minutes: int
     balance: float
     role: str  # String value to ensure proper serialization
@@ -0,0 +1,126 @@
+"""
+Revenue and usage analytics over pre-aggregated hourly and daily buckets.
+
+Writers call `record_topup` / `record_rental_sale` inside the transaction of
+the event they describe; each call is a handful of single-row upserts, so
+the cost does not grow with history. Readers only ever touch
+`usage_buckets`, never `transactions` or `rentals`.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.usage_bucket import FLEET_ID, UsageBucket, UsageBucketDriver
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+async def _bump(db: AsyncSession, car_id, ts: datetime, **deltas):
+    for granularity in GRANULARITIES:
+        stmt = insert(UsageBucket).values(
+            granularity=granularity, bucket_start=bucket_start(ts, granularity), car_id=car_id, **deltas
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UsageBucket.granularity, UsageBucket.bucket_start, UsageBucket.car_id],
+            set_={name: getattr(UsageBucket, name) + stmt.excluded[name] for name in deltas},
+        )
+        await db.execute(stmt)
+
+
+async def _mark_driver(db: AsyncSession, car_id, user_id, ts: datetime):
+    """Counts the driver once per bucket"""
+    for granularity in GRANULARITIES:
+        start = bucket_start(ts, granularity)
+        stmt = (
+            insert(UsageBucketDriver)
+            .values(granularity=granularity, bucket_start=start, car_id=car_id, user_id=user_id)
+            .on_conflict_do_nothing()
+            .returning(UsageBucketDriver.user_id)
+        )
+        if (await db.execute(stmt)).first() is None:
+            continue
+        bump = insert(UsageBucket).values(
+            granularity=granularity, bucket_start=start, car_id=car_id, active_drivers=1
+        )
+        bump = bump.on_conflict_do_update(
+            index_elements=[UsageBucket.granularity, UsageBucket.bucket_start, UsageBucket.car_id],
+            set_={"active_drivers": UsageBucket.active_drivers + 1},
+        )
+        await db.execute(bump)
+
+
+async def record_topup(db: AsyncSession, amount_uah, ts: Optional[datetime] = None):
+    ts = ts or datetime.utcnow()
+    await _bump(db, FLEET_ID, ts, topups_count=1, topup_revenue_uah=Decimal(str(amount_uah)))
+
+
+async def record_rental_sale(
+    db: AsyncSession,
+    car_id,
+    user_id,
+    minutes: int,
+    cost_uah,
+    new_rental: bool,
+    ts: Optional[datetime] = None,
+):
+    """A rental start (new_rental=True) or an extension of `minutes` for `cost_uah`"""
+    ts = ts or datetime.utcnow()
+    deltas = {
+        "rentals_started": 1 if new_rental else 0,
+        "rental_minutes_sold": minutes,
+        "rental_revenue_uah": Decimal(str(cost_uah)),
+    }
+    for bucket_car_id in (car_id, FLEET_ID):
+        await _bump(db, bucket_car_id, ts, **deltas)
+        await _mark_driver(db, bucket_car_id, user_id, ts)
+
+
+async def get_series(
+    db: AsyncSession,
+    granularity: str,
+    date_from: datetime,
+    date_to: datetime,
+    car_id=None,
+) -> List[UsageBucket]:
+    """Buckets in [date_from, date_to), fleet-wide unless car_id is given"""
+    result = await db.execute(
+        select(UsageBucket)
+        .where(UsageBucket.granularity == granularity)
+        .where(UsageBucket.car_id == (car_id or FLEET_ID))
+        .where(UsageBucket.bucket_start >= bucket_start(date_from, granularity))
+        .where(UsageBucket.bucket_start < date_to)
+        .order_by(UsageBucket.bucket_start)
+    )
+    return result.scalars().all()
+
+
+async def get_car_totals(db: AsyncSession, granularity: str, date_from: datetime, date_to: datetime):
+    """Per-car totals over a period, summed from buckets"""
+    result = await db.execute(
+        select(
+            UsageBucket.car_id,
+            func.sum(UsageBucket.rentals_started).label("rentals_started"),
+            func.sum(UsageBucket.rental_minutes_sold).label("rental_minutes_sold"),
+            func.sum(UsageBucket.rental_revenue_uah).label("rental_revenue_uah"),
+        )
+        .where(UsageBucket.granularity == granularity)
+        .where(UsageBucket.car_id != FLEET_ID)
+        .where(UsageBucket.bucket_start >= bucket_start(date_from, granularity))
+        .where(UsageBucket.bucket_start < date_to)
+        .group_by(UsageBucket.car_id)
+        .order_by(func.sum(UsageBucket.rental_revenue_uah).desc())
+    )
+    return result.all()
@@ -0,0 +1,143 @@
+"""
+Car changefeed.
+
+Every change to a car's public state (status, battery, price, rental window)
+is appended to an in-memory log with a monotonically increasing sequence
+number. Clients remember the last sequence they saw and resume from it after
+a reconnect, over HTTP long-poll (`GET /api/cars/changes`) or the status
+WebSocket. When the requested sequence has already fallen out of the
+retention window (or the server restarted, which changes the `epoch`), the
+client is told to take a full snapshot instead.
+"""
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, List, Optional
+
+from app.config import settings
+from app.models.car import CarStatus
+from app.websocket.manager import manager
+
+
+class CarChangeFeed:
+    def __init__(self, max_events: int, max_age_seconds: int):
+        self.max_events = max_events
+        self.max_age_seconds = max_age_seconds
+        # Changes on restart, so clients can tell their sequence is from an old process
+        self.epoch = uuid.uuid4().hex
+        self.last_seq = 0
+        self._events: Deque[dict] = deque()
+        self._new_event = asyncio.Event()
+
+    def _trim(self):
+        cutoff = time.monotonic() - self.max_age_seconds
+        while self._events and (
+            len(self._events) > self.max_events or self._events[0]["_ts"] < cutoff
+        ):
+            self._events.popleft()
+
+    def publish(self, car_id, state: dict) -> dict:
+        self.last_seq += 1
+        event = {
+            "seq": self.last_seq,
+            "car_id": str(car_id),
+            "state": state,
+            "_ts": time.monotonic(),
+        }
+        self._events.append(event)
+        self._trim()
+
+        # Wake up every long-poll waiter, then arm a fresh event for the next round
+        self._new_event.set()
+        self._new_event = asyncio.Event()
+        return event
+
+    def since(self, seq: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Events with sequence > seq, oldest first.
+        Returns None when the client cannot resume and needs a full snapshot.
+        """
+        self._trim()
+        if epoch is not None and epoch != self.epoch:
+            return None
+        # since=0 means the client has no baseline yet
+        if seq <= 0 or seq > self.last_seq:
+            return None
+        if seq == self.last_seq:
+            return []
+        oldest = self._events[0]["seq"] if self._events else self.last_seq + 1
+        if seq < oldest - 1:
+            return None
+        return [_public(e) for e in self._events if e["seq"] > seq]
+
+    async def wait_next(self, timeout: float) -> bool:
+        """Blocks until the next publish; False on timeout."""
+        try:
+            await asyncio.wait_for(self._new_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait(self, seq: int, epoch: Optional[str], timeout: float) -> Optional[List[dict]]:
+        """Long-poll variant of `since`: blocks until something newer than seq arrives or timeout."""
+        changes = self.since(seq, epoch)
+        if changes is None or changes:
+            return changes
+        if not await self.wait_next(timeout):
+            return []
+        return self.since(seq, epoch)
+
+
+def _public(event: dict) -> dict:
+    return {k: v for k, v in event.items() if not k.startswith("_")}
+
+
+car_feed = CarChangeFeed(
+    max_events=settings.CHANGEFEED_RETENTION_EVENTS,
+    max_age_seconds=settings.CHANGEFEED_RETENTION_SECONDS,
+)
+
+
+def car_state(car, rental=None, booked_by_name: Optional[str] = None) -> dict:
+    """
+    Public, JSON-serializable state of a car as seen by the dashboard.
+    Without a rental, falls back to `busy_until` / `booked_by_name` set by
+    `attach_rental_info` (if any).
+    """
+    status = car.status.value if hasattr(car.status, "value") else str(car.status)
+    busy_until = None
+    if rental is not None:
+        duration = rental.duration_minutes + (rental.extended_minutes or 0)
+        busy_until = rental.started_at + timedelta(minutes=duration)
+    else:
+        busy_until = getattr(car, "busy_until", None)
+        booked_by_name = booked_by_name or getattr(car, "booked_by_name", None)
+    if status != CarStatus.BUSY.value:
+        busy_until, booked_by_name = None, None
+
+    return {
+        "id": str(car.id),
+        "name": car.name,
+        "track": getattr(car, "track", None),
+        "status": status,
+        "battery_level": car.battery_level,
+        "price_per_minute": float(car.price_per_minute) if car.price_per_minute is not None else None,
+        "busy_until": busy_until.isoformat() if isinstance(busy_until, datetime) else None,
+        "booked_by_name": booked_by_name,
+        "deleted": False,
+    }
+
+
+async def publish_car_change(car, rental=None, booked_by_name: Optional[str] = None) -> dict:
+    """Record a car change and push it to every status WebSocket observer."""
+    event = car_feed.publish(car.id, car_state(car, rental, booked_by_name))
+    await manager.broadcast_car_change(car_feed.epoch, _public(event))
+    return event
+
+
+async def publish_car_deleted(car_id) -> dict:
+    event = car_feed.publish(car_id, {"id": str(car_id), "deleted": True})
+    await manager.broadcast_car_change(car_feed.epoch, _public(event))
+    return event
@@ -0,0 +1,204 @@
+"""
+Persistent email outbox.
+
+Request handlers only INSERT a rendered message (in their own DB
+transaction), so a slow or failing SMTP server never touches request
+latency and nothing is lost on restart. A background worker claims due
+messages (FOR UPDATE SKIP LOCKED plus a lease, like the payment inbox),
+sends them with bounded concurrency over the pooled transport, and retries failures with
+exponential backoff; after EMAIL_MAX_ATTEMPTS a message is marked "dead".
+Sent messages have their body cleared and are deleted after a week.
+Transactional mail (codes, resets, replies) is claimed before bulk sends,
+so a large announcement never delays a verification code.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.utils.mailer import transport
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+PRIORITY_TRANSACTIONAL = 0
+PRIORITY_BULK = 1
+
+LEASE_SECONDS = 120
+
+_wakeup = asyncio.Event()
+_metrics = {"sent": 0, "failed_attempts": 0, "dead": 0, "send_ms_total": 0.0, "started_at": time.monotonic()}
+
+
+async def enqueue_bulk(db: AsyncSession, kind: str, subject: str, html: str, recipients) -> int:
+    """
+    Queues the same message for every email selected by `recipients` (a
+    one-column SELECT) with a single INSERT ... SELECT, then commits.
+    Returns the number of queued messages.
+    """
+    now = datetime.utcnow()
+    recipients = recipients.subquery()
+    rows = select(
+        literal(kind), recipients.c[0], literal(subject), literal(html),
+        literal(PENDING), literal(PRIORITY_BULK), literal(0), literal(now), literal(now),
+    )
+    result = await db.execute(
+        insert(EmailOutbox).from_select(
+            ["kind", "recipient", "subject", "html", "status", "priority", "attempts", "next_attempt_at", "created_at"],
+            rows,
+        )
+    )
+    await db.commit()
+    _wakeup.set()
+    return result.rowcount or 0
+
+
+async def enqueue(db: AsyncSession, kind: str, recipient: str, subject: str, html: str):
+    """Stores a message for delivery and commits (together with anything else pending in `db`)"""
+    db.add(EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        subject=subject,
+        html=html,
+        status=PENDING,
+        priority=PRIORITY_TRANSACTIONAL,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    await db.commit()
+    _wakeup.set()
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(6 * 3600, settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+async def _claim_batch(limit: int):
+    async with AsyncSessionLocal() as db:
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == PENDING, EmailOutbox.next_attempt_at <= datetime.utcnow())
+            .order_by(EmailOutbox.priority, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS),
+                attempts=EmailOutbox.attempts + 1,
+            )
+            .returning(
+                EmailOutbox.id, EmailOutbox.recipient, EmailOutbox.subject,
+                EmailOutbox.html, EmailOutbox.attempts,
+            )
+        )
+        rows = result.all()
+        await db.commit()
+        return rows
+
+
+async def _deliver(row) -> dict:
+    """Sends one message; returns the column updates for its row"""
+    started = time.perf_counter()
+    try:
+        await transport.send(row.recipient, row.subject, row.html)
+    except Exception as e:
+        if row.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            _metrics["dead"] += 1
+            print(f"❌ Email to {row.recipient} dead-lettered after {row.attempts} attempts: {e}")
+            return {"status": DEAD, "last_error": str(e)}
+        _metrics["failed_attempts"] += 1
+        return {"last_error": str(e), "next_attempt_at": datetime.utcnow() + _backoff(row.attempts)}
+    _metrics["sent"] += 1
+    _metrics["send_ms_total"] += (time.perf_counter() - started) * 1000
+    return {"status": SENT, "sent_at": datetime.utcnow(), "html": "", "last_error": None}
+
+
+def _batch_size() -> int:
+    """As many messages as can be sent within one lease, even if every send hits the SMTP timeout"""
+    per_slot = max(1, LEASE_SECONDS // settings.SMTP_TIMEOUT_SECONDS)
+    return min(200, per_slot * settings.EMAIL_SEND_CONCURRENCY)
+
+
+async def process_due(limit: Optional[int] = None) -> int:
+    rows = await _claim_batch(limit or _batch_size())
+    if not rows:
+        return 0
+    semaphore = asyncio.Semaphore(settings.EMAIL_SEND_CONCURRENCY)
+
+    async def deliver(row):
+        async with semaphore:
+            values = await _deliver(row)
+        # Recorded right away: a sent message must not wait for the rest of the batch,
+        # or it could be re-claimed (and sent twice) once the lease expires
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values))
+            await db.commit()
+
+    await asyncio.gather(*(deliver(row) for row in rows))
+    return len(rows)
+
+
+async def purge_sent(older_than: timedelta = timedelta(days=7)):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(EmailOutbox).where(EmailOutbox.status == SENT, EmailOutbox.sent_at < datetime.utcnow() - older_than)
+        )
+        await db.commit()
+
+
+async def outbox_stats(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(EmailOutbox.status, func.count(EmailOutbox.id), func.min(EmailOutbox.created_at))
+        .group_by(EmailOutbox.status)
+    )
+    counts, oldest_pending = {}, None
+    for status, count, oldest in result.all():
+        counts[status] = count
+        if status == PENDING:
+            oldest_pending = oldest
+    sent = _metrics["sent"]
+    uptime = time.monotonic() - _metrics["started_at"]
+    return {
+        "counts": counts,
+        "oldest_pending_age_seconds": (
+            round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else None
+        ),
+        "worker": {
+            "sent": sent,
+            "failed_attempts": _metrics["failed_attempts"],
+            "dead": _metrics["dead"],
+            "avg_send_ms": round(_metrics["send_ms_total"] / sent, 1) if sent else None,
+            "sent_per_minute": round(sent / uptime * 60, 2) if uptime > 0 else None,
+            "transport": transport.stats(),
+        },
+    }
+
+
+async def start_email_outbox_worker(poll_seconds: float = 5.0):
+    print("🚀 Email Outbox Worker Started")
+    last_purge = 0.0
+    while True:
+        try:
+            while await process_due():
+                pass
+            if time.monotonic() - last_purge > 3600:
+                await purge_sent()
+                last_purge = time.monotonic()
+        except Exception as e:
+            print(f"❌ Email Outbox Worker Error: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
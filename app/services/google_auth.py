@@ -0,0 +1,118 @@
+"""
+Google ID token verification without blocking the event loop.
+
+Google's signing keys (JWKS) are fetched asynchronously and cached for the
+lifetime announced in the response's Cache-Control header; tokens are then
+checked offline (RS256 signature, audience, issuer, expiry). An unknown key
+id triggers one early refresh (rate limited), covering key rotation. If a
+refresh fails, the previous keys stay in use until it succeeds.
+
+The fetcher is injectable: tests can pass any async callable returning
+(jwks_dict, max_age_seconds).
+"""
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from jose import jwt, JWTError
+
+from app.config import settings
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+Fetcher = Callable[[], Awaitable[Tuple[dict, int]]]
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def fetch_google_certs() -> Tuple[dict, int]:
+    """Default fetcher: Google's JWKS and its max-age"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=settings.GOOGLE_CERTS_TIMEOUT_SECONDS)
+    response = await _http_client.get(GOOGLE_CERTS_URL)
+    response.raise_for_status()
+    match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+    max_age = int(match.group(1)) if match else settings.GOOGLE_CERTS_DEFAULT_TTL_SECONDS
+    return response.json(), max_age
+
+
+class GoogleKeySet:
+    # Don't hammer Google when tokens carry unknown key ids
+    MIN_REFRESH_INTERVAL = 60
+
+    def __init__(self, fetcher: Fetcher = fetch_google_certs):
+        self.fetcher = fetcher
+        self._keys: Dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self._keys) and time.monotonic() < self._expires_at
+
+    async def refresh(self, force: bool = False):
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited for the lock
+            if self.fresh and not force:
+                return
+            # With keys at hand (even stale ones) fetch at most once a minute
+            if self._keys and time.monotonic() - self._last_fetch < self.MIN_REFRESH_INTERVAL:
+                return
+            self._last_fetch = time.monotonic()
+            try:
+                jwks, max_age = await self.fetcher()
+            except Exception as e:
+                print(f"❌ Google certs fetch failed: {e}")
+                return
+            self._keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+            self._expires_at = time.monotonic() + max_age
+
+    async def get_key(self, kid: str) -> Optional[dict]:
+        if not self.fresh:
+            await self.refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            await self.refresh(force=True)
+            key = self._keys.get(kid)
+        return key
+
+    def seconds_until_expiry(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+
+google_keys = GoogleKeySet()
+
+
+async def verify_google_token(token: str, keys: GoogleKeySet = google_keys) -> Optional[dict]:
+    """Claims of a valid Google ID token for our client id, or None"""
+    try:
+        header = jwt.get_unverified_header(token)
+        key = await keys.get_key(header.get("kid", ""))
+        if key is None:
+            return None
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_ID,
+            options={"verify_at_hash": False},
+        )
+    except JWTError:
+        return None
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        return None
+    return claims
+
+
+async def start_google_keys_refresh():
+    """Refreshes the key set shortly before it expires, so logins never wait on a fetch"""
+    print("🚀 Google Keys Refresh Started")
+    while True:
+        # Forced: the keys are still fresh at this point, that's the idea
+        await google_keys.refresh(force=True)
+        await asyncio.sleep(max(60.0, google_keys.seconds_until_expiry() - 60))
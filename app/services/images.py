@@ -0,0 +1,149 @@
+"""
+Image derivative pipeline for car images and avatars.
+
+After an upload is stored, `schedule_variants` renders resized WebP (and
+AVIF, when Pillow supports it) copies in a process pool of IMAGE_WORKERS
+processes, so decoding and encoding never block the event loop or hold the
+GIL. The result is written next to the original as `{stem}-{width}.{fmt}`
+plus a manifest, and recorded as a {format: {width: url}} dict on
+`Car.image_variants` / `User.avatar_variants` of every row pointing at the
+upload. The frontend builds `srcset` from it; the original stays the
+fallback `src`, so a failed or pending render only costs bandwidth.
+"""
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.car import Car
+from app.models.user import User
+from app.services.principal_cache import invalidate_principal
+from app.services.storage import storage
+from app.utils.images import manifest_path, render_variants
+
+CAR = "car"
+AVATAR = "avatar"
+
+WIDTHS = {
+    CAR: (320, 640, 1280),    # Dashboard cards at 1x/2x, detail views
+    AVATAR: (64, 128, 256),   # Header and profile at 1x/2x
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_tasks: set = set()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn": workers must not inherit the event loop and thread pools of this process
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def local_path(url: Optional[str]) -> Optional[Path]:
+    """Path of an uploaded file from its public URL (None for external URLs and remote storage)"""
+    key = storage.key_from_url(url)
+    return storage.local_path(key) if key else None
+
+
+def _to_urls(url: str, variants: Dict[str, Dict[str, str]]) -> dict:
+    base = url.rsplit("/", 1)[0]
+    return {
+        fmt: {width: f"{base}/{filename}" for width, filename in files.items()}
+        for fmt, files in variants.items()
+    }
+
+
+def _read_manifest(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(manifest_path(path).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+async def load_variants(url: Optional[str]) -> Optional[dict]:
+    """Variant URLs of an already processed upload, or None"""
+    path = local_path(url)
+    if path is None:
+        return None
+    variants = await asyncio.to_thread(_read_manifest, path)
+    return _to_urls(url, variants) if variants else None
+
+
+async def render(url: str, kind: str) -> Optional[dict]:
+    """Renders the variants of an upload in the process pool; returns their URLs"""
+    path = local_path(url)
+    if path is None:
+        return None
+    loop = asyncio.get_running_loop()
+    variants = await loop.run_in_executor(_executor(), render_variants, str(path), WIDTHS[kind])
+    return _to_urls(url, variants)
+
+
+async def process_upload(url: str, kind: str):
+    """Renders an upload and stores the variant URLs on the rows that use it"""
+    try:
+        # A duplicate upload maps to a blob whose variants already exist
+        variants = await load_variants(url) or await render(url, kind)
+    except Exception as e:
+        print(f"❌ Image Variants Error ({url}): {e}")
+        return
+    if variants is None:
+        return
+
+    async with AsyncSessionLocal() as db:
+        if kind == CAR:
+            await db.execute(update(Car).where(Car.image_url == url).values(image_variants=variants))
+            await db.commit()
+        else:
+            result = await db.execute(
+                update(User).where(User.avatar_url == url).values(avatar_variants=variants).returning(User.id)
+            )
+            user_ids = result.scalars().all()
+            await db.commit()
+            # Bulk UPDATE bypasses the session listener of the principal cache
+            for user_id in user_ids:
+                invalidate_principal(user_id)
+
+
+def schedule_variants(url: str, kind: str):
+    """Starts `process_upload` in the background (the upload response doesn't wait)"""
+    task = asyncio.create_task(process_upload(url, kind))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def backfill_variants():
+    """One pass over images uploaded before the pipeline existed (or whose render failed)"""
+    try:
+        await _backfill()
+    except Exception as e:
+        print(f"❌ Image Variants Backfill Error: {e}")
+
+
+async def _backfill():
+    async with AsyncSessionLocal() as db:
+        car_urls = (await db.execute(
+            select(Car.image_url).where(Car.image_url.like(f"{storage.base_url}/%"), Car.image_variants.is_(None)).distinct()
+        )).scalars().all()
+        avatar_urls = (await db.execute(
+            select(User.avatar_url).where(User.avatar_url.like(f"{storage.base_url}/%"), User.avatar_variants.is_(None)).distinct()
+        )).scalars().all()
+
+    print(f"🚀 Image Variants Backfill Started ({len(car_urls)} car images, {len(avatar_urls)} avatars)")
+    for kind, urls in ((CAR, car_urls), (AVATAR, avatar_urls)):
+        for url in urls:
+            path = local_path(url)
+            if path is not None and path.exists():
+                await process_upload(url, kind)
@@ -0,0 +1,169 @@
+"""
+Durable inbox for LiqPay callbacks.
+
+The callback endpoint only verifies the signature and stores the decoded
+payload with a single INSERT, then acknowledges, so its latency does not
+depend on contention around transactions and balances. This worker claims
+pending rows in arrival order (FOR UPDATE SKIP LOCKED, so several workers
+can run side by side), applies them through `apply_payment_status`, and
+retries failures with exponential backoff; rows that keep failing are
+marked "dead" for manual inspection.
+
+A claimed row gets a lease (next_attempt_at pushed forward); if a worker
+dies mid-batch the rows become due again once the lease runs out, and
+reapplying is safe because the status transition is idempotent.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.payment_webhook import PaymentWebhook
+from app.services import payments
+
+PENDING = "pending"
+DONE = "done"
+DEAD = "dead"
+
+LEASE_SECONDS = 60
+
+_wakeup = asyncio.Event()
+_metrics = {"processed": 0, "retried": 0, "dead": 0, "lag_ms_total": 0.0, "lag_ms_max": 0.0}
+
+
+async def enqueue(db: AsyncSession, payload: dict):
+    """Stores a verified callback (duplicates of a stored one are dropped) and commits"""
+    stmt = insert(PaymentWebhook).values(
+        order_id=str(payload.get("order_id")),
+        provider_status=str(payload.get("status")),
+        payload=payload,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        received_at=datetime.utcnow(),
+    ).on_conflict_do_nothing(constraint="uq_payment_webhooks_order_status")
+    await db.execute(stmt)
+    await db.commit()
+    _wakeup.set()
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(3600, settings.PAYMENT_INBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+async def _claim_batch(limit: int):
+    async with AsyncSessionLocal() as db:
+        due = (
+            select(PaymentWebhook.id)
+            .where(PaymentWebhook.status == PENDING, PaymentWebhook.next_attempt_at <= datetime.utcnow())
+            .order_by(PaymentWebhook.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(PaymentWebhook)
+            .where(PaymentWebhook.id.in_(due.scalar_subquery()))
+            .values(
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS),
+                attempts=PaymentWebhook.attempts + 1,
+            )
+            .returning(
+                PaymentWebhook.id, PaymentWebhook.order_id, PaymentWebhook.provider_status,
+                PaymentWebhook.attempts, PaymentWebhook.received_at,
+            )
+        )
+        rows = sorted(result.all(), key=lambda r: r.id)
+        await db.commit()
+        return rows
+
+
+async def _finish(row_id: int, values: dict):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(PaymentWebhook).where(PaymentWebhook.id == row_id).values(**values))
+        await db.commit()
+
+
+async def _process(row):
+    try:
+        async with AsyncSessionLocal() as db:
+            outcome = await payments.apply_payment_status(db, row.order_id, row.provider_status)
+    except Exception as e:
+        if row.attempts >= settings.PAYMENT_INBOX_MAX_ATTEMPTS:
+            _metrics["dead"] += 1
+            print(f"❌ Payment inbox: order {row.order_id} dead-lettered after {row.attempts} attempts: {e}")
+            await _finish(row.id, {"status": DEAD, "last_error": str(e), "processed_at": datetime.utcnow()})
+        else:
+            _metrics["retried"] += 1
+            await _finish(row.id, {"last_error": str(e), "next_attempt_at": datetime.utcnow() + _backoff(row.attempts)})
+        return
+
+    if outcome == payments.NOT_FOUND:
+        # Retrying won't make the transaction appear
+        _metrics["dead"] += 1
+        await _finish(row.id, {"status": DEAD, "last_error": "Transaction not found", "processed_at": datetime.utcnow()})
+        return
+
+    now = datetime.utcnow()
+    lag_ms = (now - row.received_at).total_seconds() * 1000
+    _metrics["processed"] += 1
+    _metrics["lag_ms_total"] += lag_ms
+    _metrics["lag_ms_max"] = max(_metrics["lag_ms_max"], lag_ms)
+    await _finish(row.id, {"status": DONE, "processed_at": now, "last_error": None})
+
+
+async def process_due(limit: int = 100) -> int:
+    rows = await _claim_batch(limit)
+    # In order: two results for one order are applied as they arrived
+    for row in rows:
+        await _process(row)
+    return len(rows)
+
+
+async def inbox_stats(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(
+            PaymentWebhook.status,
+            func.count(PaymentWebhook.id),
+            func.min(PaymentWebhook.received_at),
+        ).group_by(PaymentWebhook.status)
+    )
+    counts, oldest_pending = {}, None
+    for status, count, oldest in result.all():
+        counts[status] = count
+        if status == PENDING:
+            oldest_pending = oldest
+    processed = _metrics["processed"]
+    return {
+        "counts": counts,
+        "oldest_pending_age_seconds": (
+            round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else None
+        ),
+        "worker": {
+            "processed": processed,
+            "retried": _metrics["retried"],
+            "dead": _metrics["dead"],
+            "avg_lag_ms": round(_metrics["lag_ms_total"] / processed, 1) if processed else None,
+            "max_lag_ms": round(_metrics["lag_ms_max"], 1),
+        },
+    }
+
+
+async def start_payment_inbox_worker(poll_seconds: float = 2.0):
+    print("🚀 Payment Inbox Worker Started")
+    while True:
+        try:
+            while await process_due():
+                pass
+        except Exception as e:
+            print(f"❌ Payment Inbox Worker Error: {e}")
+        # Woken right away by callbacks received in this worker, polls for the rest
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
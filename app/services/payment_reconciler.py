@@ -0,0 +1,175 @@
+"""
+Reconciliation of PENDING transactions against LiqPay's status API.
+
+Callbacks get lost and users close the checkout page, leaving
+transactions PENDING forever. Every PAYMENT_RECONCILE_INTERVAL_SECONDS
+this job walks PENDING transactions older than
+PAYMENT_RECONCILE_MIN_AGE_MINUTES in keyset-paginated batches, asks the
+provider for their status with at most PAYMENT_RECONCILE_CONCURRENCY
+requests in flight, and applies final results through the same
+idempotent `apply_payment_status` the webhook inbox uses.
+
+The provider is swappable: `StubStatusProvider` answers from a dict, for
+tests and local runs (PAYMENT_STATUS_PROVIDER=stub).
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Protocol
+
+import httpx
+from sqlalchemy import and_, func, or_
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.transaction import Transaction, TransactionStatus
+from app.services import payments
+from app.utils.liqpay import liqpay
+
+LIQPAY_API_URL = "https://www.liqpay.ua/api/request"
+ADVISORY_LOCK_ID = 0x6C697170  # Arbitrary, unique to this job
+
+# Only these settle a transaction. LiqPay's "error" describes the status
+# request itself (bad key, rate limit, unknown order), not the payment.
+FINAL_STATUSES = payments.SUCCESS_STATUSES | {"failure", "reversed"}
+
+
+class PaymentStatusProvider(Protocol):
+    async def get_status(self, order_id: str) -> Optional[str]:
+        """Provider's final status for the order, or None if unknown / not final / not fetched"""
+        ...
+
+
+class LiqPayStatusProvider:
+    def __init__(self, timeout: float = 10.0):
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def get_status(self, order_id: str) -> Optional[str]:
+        try:
+            response = await self._client.post(LIQPAY_API_URL, data=liqpay.get_status_params(order_id))
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"⚠️ LiqPay status request failed for {order_id}: {e}")
+            return None
+        if body.get("result") == "error" or body.get("err_code"):
+            print(f"⚠️ LiqPay status request rejected for {order_id}: {body.get('err_code')} {body.get('err_description', '')}")
+            return None
+        status = body.get("status")
+        return status if status in FINAL_STATUSES else None
+
+
+class StubStatusProvider:
+    """Answers from a dict; unknown orders get `default`"""
+
+    def __init__(self, statuses: Optional[Dict[str, str]] = None, default: Optional[str] = None):
+        self.statuses = statuses or {}
+        self.default = default
+
+    async def get_status(self, order_id: str) -> Optional[str]:
+        return self.statuses.get(order_id, self.default)
+
+
+class PaymentReconciler:
+    def __init__(self, provider: PaymentStatusProvider):
+        self.provider = provider
+        self.stats = {"runs": 0, "checked": 0, "credited": 0, "failed": 0, "unresolved": 0, "last_run_at": None}
+
+    async def _fetch_statuses(self, order_ids: List[str]) -> Dict[str, Optional[str]]:
+        semaphore = asyncio.Semaphore(settings.PAYMENT_RECONCILE_CONCURRENCY)
+
+        async def fetch(order_id):
+            async with semaphore:
+                return order_id, await self.provider.get_status(order_id)
+
+        return dict(await asyncio.gather(*(fetch(order_id) for order_id in order_ids)))
+
+    async def run_once(self) -> int:
+        """
+        Checks one round of stale PENDING transactions; returns how many were checked.
+        Only one worker reconciles at a time (Postgres advisory lock).
+        """
+        async with AsyncSessionLocal() as lock_db:
+            locked = (await lock_db.execute(select(func.pg_try_advisory_lock(ADVISORY_LOCK_ID)))).scalar()
+            if not locked:
+                return 0
+            try:
+                return await self._reconcile()
+            finally:
+                await lock_db.execute(select(func.pg_advisory_unlock(ADVISORY_LOCK_ID)))
+
+    async def _reconcile(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.PAYMENT_RECONCILE_MIN_AGE_MINUTES)
+        batch_size = settings.PAYMENT_RECONCILE_BATCH_SIZE
+        checked = 0
+        last = None
+
+        while checked < settings.PAYMENT_RECONCILE_MAX_PER_RUN:
+            async with AsyncSessionLocal() as db:
+                query = (
+                    select(Transaction.id, Transaction.created_at, Transaction.liqpay_order_id)
+                    .where(
+                        Transaction.status == TransactionStatus.PENDING,
+                        Transaction.created_at < cutoff,
+                        Transaction.liqpay_order_id.is_not(None),
+                    )
+                    .order_by(Transaction.created_at, Transaction.id)
+                    .limit(batch_size)
+                )
+                if last is not None:
+                    query = query.where(or_(
+                        Transaction.created_at > last[0],
+                        and_(Transaction.created_at == last[0], Transaction.id > last[1]),
+                    ))
+                rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            last = (rows[-1].created_at, rows[-1].id)
+
+            # No DB connection is held while waiting on the provider
+            statuses = await self._fetch_statuses([row.liqpay_order_id for row in rows])
+            async with AsyncSessionLocal() as db:
+                for order_id, provider_status in statuses.items():
+                    outcome = payments.STILL_PENDING
+                    # A query error must never turn into a failed payment
+                    if provider_status in FINAL_STATUSES:
+                        outcome = await payments.apply_payment_status(db, order_id, provider_status)
+                    if outcome == payments.CREDITED:
+                        self.stats["credited"] += 1
+                    elif outcome == payments.FAILED:
+                        self.stats["failed"] += 1
+                    elif outcome == payments.STILL_PENDING:
+                        self.stats["unresolved"] += 1
+
+            checked += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        self.stats["runs"] += 1
+        self.stats["checked"] += checked
+        self.stats["last_run_at"] = datetime.utcnow().isoformat()
+        return checked
+
+
+def _create_provider() -> PaymentStatusProvider:
+    provider = settings.PAYMENT_STATUS_PROVIDER.lower()
+    if provider == "liqpay":
+        return LiqPayStatusProvider()
+    if provider == "stub":
+        return StubStatusProvider()
+    raise ValueError(f"Unknown PAYMENT_STATUS_PROVIDER: {settings.PAYMENT_STATUS_PROVIDER}")
+
+
+reconciler = PaymentReconciler(_create_provider())
+
+
+async def start_payment_reconciler():
+    print("🚀 Payment Reconciler Started")
+    while True:
+        try:
+            checked = await reconciler.run_once()
+            if checked:
+                print(f"💳 Reconciler: checked {checked} pending payments")
+        except Exception as e:
+            print(f"❌ Payment Reconciler Error: {e}")
+        await asyncio.sleep(settings.PAYMENT_RECONCILE_INTERVAL_SECONDS)
@@ -0,0 +1,94 @@
+"""
+Applying LiqPay payment results.
+
+`apply_payment_status` is the single place a transaction leaves PENDING.
+The transition is one conditional UPDATE (`... WHERE status = 'pending'
+RETURNING ...`), so concurrent or retried deliveries of the same result
+can't both win: the second one waits on the row lock, then matches no row.
+The balance credit and the stats rollups go in the same DB transaction.
+"""
+import logging
+from decimal import Decimal
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.transaction import Transaction, TransactionStatus
+from app.models.user import User
+from app.services.analytics import record_topup
+from app.services.principal_cache import invalidate_principal
+from app.services.rollups import bump_daily_stats
+from app.utils.cache import TTLCache
+from app.config import settings
+
+logger = logging.getLogger("payments")
+
+SUCCESS_STATUSES = {"success", "sandbox"}
+FAILURE_STATUSES = {"failure", "error", "reversed"}
+
+# First page of each user's payment history: {user_id: {limit: PaymentHistoryPage}}
+history_cache = TTLCache(maxsize=10000, ttl=settings.PAYMENT_HISTORY_CACHE_SECONDS)
+
+
+def invalidate_history(user_id):
+    history_cache.invalidate(str(user_id))
+
+
+# Outcomes
+CREDITED = "credited"
+FAILED = "failed"
+ALREADY_PROCESSED = "already_processed"
+NOT_FOUND = "not_found"
+STILL_PENDING = "pending"
+
+
+async def apply_payment_status(db: AsyncSession, order_id: str, provider_status: str) -> str:
+    """Moves the order's transaction out of PENDING according to LiqPay's status; commits"""
+    if provider_status in SUCCESS_STATUSES:
+        new_status = TransactionStatus.SUCCESS
+    elif provider_status in FAILURE_STATUSES:
+        new_status = TransactionStatus.FAILED
+    else:
+        # processing / wait_secure / ...: not final yet, LiqPay will call again
+        return STILL_PENDING
+
+    result = await db.execute(
+        update(Transaction)
+        .where(
+            Transaction.liqpay_order_id == order_id,
+            Transaction.status == TransactionStatus.PENDING,
+        )
+        .values(status=new_status)
+        .returning(Transaction.user_id, Transaction.amount_uah)
+    )
+    row = result.first()
+    if row is None:
+        await db.rollback()
+        exists = await db.execute(select(Transaction.id).where(Transaction.liqpay_order_id == order_id))
+        return ALREADY_PROCESSED if exists.first() else NOT_FOUND
+
+    if new_status == TransactionStatus.FAILED:
+        await db.commit()
+        invalidate_history(row.user_id)
+        logger.warning(f"Payment FAILED - order_id={order_id}, status={provider_status}")
+        return FAILED
+
+    amount = Decimal(str(row.amount_uah))
+    credited = await db.execute(
+        update(User)
+        .where(User.id == row.user_id)
+        .values(balance=User.balance + amount)
+        .returning(User.email, User.balance)
+    )
+    user = credited.first()
+    await bump_daily_stats(db, topups_count=1, revenue_uah=amount)
+    await record_topup(db, amount)
+    await db.commit()
+    # Bulk UPDATE bypasses the session listener
+    invalidate_principal(row.user_id)
+    invalidate_history(row.user_id)
+
+    if user:
+        logger.info(f"Payment SUCCESS - User {user.email} balance is now {user.balance} (+{amount} UAH)")
+    return CREDITED
@@ -0,0 +1,163 @@
+"""
+Tariff pricing engine.
+
+For every car we precompute the cheapest price (in kopecks) for every
+duration from 1 to PRICING_MAX_MINUTES, combining the car's active
+`CarTariff` packages with its per-minute price. Quotes are then a table
+lookup, cheap enough for every slider movement, and `start_rental` /
+`extend_rental` charge exactly what `/api/rentals/quote` showed.
+
+Tables are cached per worker and invalidated when an admin edits the car's
+price or tariffs (other workers pick the change up after the cache TTL).
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.models.car import Car
+from app.models.car_tariff import CarTariff
+from app.utils.cache import TTLCache
+
+
+class PricingError(ValueError):
+    pass
+
+
+def _to_kopecks(value) -> int:
+    return int((Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def _to_uah(kopecks: int) -> Decimal:
+    return (Decimal(kopecks) / 100).quantize(Decimal("0.01"))
+
+
+@dataclass(frozen=True)
+class TariffPackage:
+    id: str
+    name: str
+    duration_minutes: int
+    price_kopecks: int
+
+
+@dataclass
+class Quote:
+    car_id: str
+    minutes: int
+    total: Decimal
+    per_minute_price: Decimal
+    per_minute_minutes: int
+    packages: List[dict] = field(default_factory=list)  # [{"id", "name", "duration_minutes", "price", "count"}]
+    savings: Decimal = Decimal("0.00")  # vs. paying everything per minute
+
+
+class PriceTable:
+    """Cheapest cost for every duration 0..max_minutes (unbounded knapsack over packages)."""
+
+    def __init__(self, car_id, per_minute_price, tariffs: List[TariffPackage], max_minutes: int):
+        self.car_id = str(car_id)
+        self.per_minute_kopecks = _to_kopecks(per_minute_price)
+        self.packages = sorted(tariffs, key=lambda t: t.duration_minutes)
+        self.max_minutes = max_minutes
+
+        # cost[m]: cheapest price for m minutes; choice[m]: package index or -1 for one per-minute step
+        cost = [0] * (max_minutes + 1)
+        choice = [-1] * (max_minutes + 1)
+        for m in range(1, max_minutes + 1):
+            best = cost[m - 1] + self.per_minute_kopecks
+            best_choice = -1
+            for i, package in enumerate(self.packages):
+                if package.duration_minutes > m:
+                    break
+                candidate = cost[m - package.duration_minutes] + package.price_kopecks
+                if candidate < best:
+                    best, best_choice = candidate, i
+            cost[m] = best
+            choice[m] = best_choice
+        self._cost = cost
+        self._choice = choice
+
+    def quote(self, minutes: int) -> Quote:
+        if minutes < 1 or minutes > self.max_minutes:
+            raise PricingError(f"Duration must be between 1 and {self.max_minutes} minutes")
+
+        counts = {}
+        per_minute_minutes = 0
+        m = minutes
+        while m > 0:
+            i = self._choice[m]
+            if i < 0:
+                per_minute_minutes += 1
+                m -= 1
+            else:
+                counts[i] = counts.get(i, 0) + 1
+                m -= self.packages[i].duration_minutes
+
+        packages = [
+            {
+                "id": self.packages[i].id,
+                "name": self.packages[i].name,
+                "duration_minutes": self.packages[i].duration_minutes,
+                "price": _to_uah(self.packages[i].price_kopecks),
+                "count": count,
+            }
+            for i, count in sorted(counts.items())
+        ]
+        total = self._cost[minutes]
+        return Quote(
+            car_id=self.car_id,
+            minutes=minutes,
+            total=_to_uah(total),
+            per_minute_price=_to_uah(self.per_minute_kopecks),
+            per_minute_minutes=per_minute_minutes,
+            packages=packages,
+            savings=_to_uah(self.per_minute_kopecks * minutes - total),
+        )
+
+
+_tables = TTLCache(maxsize=1024, ttl=settings.PRICING_CACHE_TTL_SECONDS)
+
+
+async def get_price_table(db: AsyncSession, car: Car) -> PriceTable:
+    table = _tables.get(str(car.id))
+    if table is not None:
+        return table
+
+    result = await db.execute(
+        select(CarTariff)
+        .where(CarTariff.car_id == car.id)
+        .where(CarTariff.is_active == True)
+    )
+    tariffs = [
+        TariffPackage(
+            id=str(t.id),
+            name=t.name,
+            duration_minutes=t.duration_minutes,
+            price_kopecks=_to_kopecks(t.price),
+        )
+        for t in result.scalars().all()
+        if t.duration_minutes and t.duration_minutes > 0
+    ]
+    table = PriceTable(car.id, car.price_per_minute, tariffs, settings.PRICING_MAX_MINUTES)
+    _tables.set(str(car.id), table)
+    return table
+
+
+async def quote_rental(db: AsyncSession, car: Car, minutes: int) -> Quote:
+    table = await get_price_table(db, car)
+    return table.quote(minutes)
+
+
+def invalidate_car_pricing(car_id: Optional[object] = None):
+    """Drop cached price tables for one car (or all cars)."""
+    if car_id is None:
+        _tables.clear()
+    else:
+        _tables.invalidate(str(car_id))
+
+
+def pricing_cache_stats() -> dict:
+    return _tables.stats()
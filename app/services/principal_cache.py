@@ -0,0 +1,96 @@
+"""
+Authenticated principal cache for get_current_user.
+
+Two per-worker LRU caches:
+- SHA-256 of a verified token -> user id (kept no longer than the token
+  itself is valid), so repeat requests skip the JWT signature check
+- user id -> snapshot of the user's columns
+
+On a hit the snapshot is attached to the request session without a SELECT,
+so handlers get a normal `User` they can modify and commit. Snapshots are
+dropped after any commit that changes or deletes the user (balance, role,
+verification, avatar, ...), via the session listener below; code that
+changes users with bulk UPDATE statements must call `invalidate_principal`.
+Other workers see such changes after AUTH_CACHE_TTL_SECONDS, so code that
+spends money re-reads the balance under a row lock.
+"""
+import hashlib
+import time
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.security import decode_access_token
+
+_tokens = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+_principals = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def resolve_token(token: str) -> Optional[str]:
+    """User id of a valid access token, or None"""
+    key = hashlib.sha256(token.encode()).digest()
+    user_id = _tokens.get(key)
+    if user_id is not None:
+        return user_id
+    payload = decode_access_token(token)
+    if not payload or not payload.get("sub"):
+        return None
+    user_id = payload["sub"]
+    remaining = payload["exp"] - time.time()
+    _tokens.set(key, user_id, ttl=min(settings.AUTH_CACHE_TTL_SECONDS, remaining))
+    return user_id
+
+
+async def load_principal(user_id: str, db: AsyncSession) -> Optional[User]:
+    """Session-bound User for `user_id`, from the snapshot cache when possible"""
+    snapshot = _principals.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if user is not None:
+        _principals.set(user_id, {name: getattr(user, name) for name in _COLUMNS})
+    return user
+
+
+def invalidate_principal(user_id=None):
+    """Drop the cached snapshot of one user (or of everyone)"""
+    if user_id is None:
+        _principals.clear()
+    else:
+        _principals.invalidate(str(user_id))
+
+
+def principal_cache_stats() -> dict:
+    return {"tokens": _tokens.stats(), "principals": _principals.stats()}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(str(obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    # After commit, so a concurrent request can't re-cache the old row
+    for user_id in session.info.pop("changed_user_ids", ()):
+        _principals.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
@@ -0,0 +1,155 @@
+"""
+Token-bucket rate limiting for the auth endpoints.
+
+Each rule has buckets per client IP and/or per account (email). A request
+takes one token from every bucket of its rule; an empty bucket means an
+immediate 429 with Retry-After, before any password hashing, email send or
+DB work in the handler.
+
+Backends (RATE_LIMIT_BACKEND):
+- "memory": per-worker buckets
+- "database": the rate_limit_buckets table, one atomic upsert per bucket,
+  so limits hold across workers
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.rate_limit_bucket import RateLimitBucket
+
+
+@dataclass(frozen=True)
+class Limit:
+    scope: str  # "ip" or "account"
+    capacity: int  # Burst size
+    per_seconds: float  # Time to refill the whole bucket
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+RULES = {
+    "login": [Limit("ip", 20, 60), Limit("account", 5, 300)],
+    "register": [Limit("ip", 5, 600)],
+    "forgot-password": [Limit("ip", 5, 600), Limit("account", 3, 900)],
+    "verify-email": [Limit("ip", 20, 60), Limit("account", 10, 600)],
+}
+
+
+class InMemoryBuckets:
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+
+    async def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        """(allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.rate
+
+    async def purge(self):
+        pass
+
+
+class DatabaseBuckets:
+    async def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        table = RateLimitBucket.__table__
+        elapsed = func.extract("epoch", func.now() - table.c.updated_at)
+        refilled = func.least(limit.capacity, table.c.tokens + elapsed * limit.rate)
+        stmt = insert(table).values(key=key, tokens=limit.capacity - 1, updated_at=func.now())
+        # A rejected request leaves the bucket at most one token in debt
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={"tokens": func.greatest(refilled - 1, -1), "updated_at": func.now()},
+        ).returning(table.c.tokens)
+        async with AsyncSessionLocal() as db:
+            tokens = (await db.execute(stmt)).scalar()
+            await db.commit()
+        if tokens >= 0:
+            return True, 0.0
+        return False, -tokens / limit.rate
+
+    async def purge(self):
+        # Untouched for a day: the bucket is full again, the row carries no information
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(RateLimitBucket).where(RateLimitBucket.updated_at < func.now() - timedelta(days=1))
+            )
+            await db.commit()
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = defaultdict(int)
+        self.rejected = defaultdict(int)
+
+    async def check(self, rule: str, request: Request, account: Optional[str] = None):
+        """Raises 429 if any bucket of `rule` for this client / account is empty"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        ip = request.client.host if request.client else "unknown"
+        for limit in RULES[rule]:
+            if limit.scope == "account":
+                if not account:
+                    continue
+                subject = account.strip().lower()
+            else:
+                subject = ip
+            allowed, retry_after = await self.backend.take(f"{rule}:{limit.scope}:{subject}", limit)
+            if not allowed:
+                self.rejected[f"{rule}:{limit.scope}"] += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests. Please try again later.",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+        self.allowed[rule] += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+        }
+
+
+def _create_limiter() -> RateLimiter:
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "database":
+        return RateLimiter(DatabaseBuckets())
+    if backend == "memory":
+        return RateLimiter(InMemoryBuckets())
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+
+auth_limiter = _create_limiter()
+
+
+async def start_rate_limit_cleanup(interval_seconds: int = 3600):
+    print("🚀 Rate Limit Cleanup Started")
+    while True:
+        try:
+            await auth_limiter.backend.purge()
+        except Exception as e:
+            print(f"❌ Rate Limit Cleanup Error: {e}")
+        await asyncio.sleep(interval_seconds)
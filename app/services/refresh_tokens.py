@@ -0,0 +1,129 @@
+"""
+Refresh-token flow: short-lived access JWTs plus opaque, rotating refresh
+tokens stored (hashed) in `refresh_tokens`.
+
+- issue_token_pair: new family at login
+- rotate: exchanges a refresh token for a new pair; reusing an already
+  rotated token is treated as theft and revokes the whole family, unless
+  it was rotated moments ago (another tab of the same browser refreshing
+  at the same time), which raises TokenAlreadyRotated instead
+- revoke_family / revoke_user_tokens: logout and password reset
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.models.refresh_token import RefreshToken
+from app.utils.security import create_access_token
+
+# A just-rotated token presented again within this window is not treated as theft
+REUSE_GRACE_SECONDS = 10
+
+
+class TokenAlreadyRotated(Exception):
+    """The token was exchanged moments ago; the client should use its successor"""
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def _new_refresh_token(db: AsyncSession, user_id, family_id) -> tuple[RefreshToken, str]:
+    token = secrets.token_urlsafe(48)
+    record = RefreshToken(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(record)
+    return record, token
+
+
+def _pair(user_id, refresh_token: str) -> dict:
+    return {
+        "access_token": create_access_token(subject=user_id),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+async def issue_token_pair(db: AsyncSession, user_id) -> dict:
+    """Starts a new refresh family for the user and commits it"""
+    # Housekeeping: the user's expired tokens are no longer needed
+    await db.execute(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.expires_at < datetime.utcnow(),
+        )
+    )
+    _, token = await _new_refresh_token(db, user_id, uuid.uuid4())
+    await db.commit()
+    return _pair(user_id, token)
+
+
+async def rotate(db: AsyncSession, refresh_token: str) -> Optional[dict]:
+    """
+    New token pair for a valid refresh token, or None.
+    Raises TokenAlreadyRotated for a token rotated within REUSE_GRACE_SECONDS.
+    """
+    result = await db.execute(
+        select(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        .with_for_update()
+    )
+    record = result.scalars().first()
+    if not record:
+        return None
+
+    now = datetime.utcnow()
+    if record.revoked_at is not None:
+        # Two tabs refreshing at once is normal; a late replay of an old token is not
+        if record.replaced_by and (now - record.revoked_at).total_seconds() < REUSE_GRACE_SECONDS:
+            raise TokenAlreadyRotated()
+        await revoke_family(db, record.family_id)
+        return None
+    if record.expires_at <= now:
+        return None
+
+    new_record, token = await _new_refresh_token(db, record.user_id, record.family_id)
+    record.revoked_at = now
+    record.replaced_by = new_record.id
+    await db.commit()
+    return _pair(record.user_id, token)
+
+
+async def revoke_family(db: AsyncSession, family_id):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
+
+
+async def revoke_token(db: AsyncSession, refresh_token: str):
+    """Logout: revokes the family the token belongs to"""
+    result = await db.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+    )
+    family_id = result.scalar()
+    if family_id is not None:
+        await revoke_family(db, family_id)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id):
+    """Revokes every refresh token of the user (no commit)"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
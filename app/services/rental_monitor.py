@@ -6,6 +6,7 @@ from app.database import AsyncSessionLocal
 from app.models.rental import Rental, RentalStatus
 from app.models.car import Car, CarStatus
 from app.websocket.manager import manager
+from app.services.changefeed import publish_car_change
 
 async def check_expired_rentals():
     """
@@ -21,6 +22,7 @@ async def check_expired_rentals():
             active_rentals = result.scalars().all()
             
             expired_count = 0
+            changed_cars = []
             
             for rental in active_rentals:
                 # Calculate expiry
@@ -40,6 +42,7 @@ async def check_expired_rentals():
                     
                     if car:
                         car.status = CarStatus.FREE
+                        changed_cars.append(car)
                         
                         # Stop Stream
                         if car.raspberry_id:
@@ -72,6 +75,7 @@ async def check_expired_rentals():
                 if not active_rental:
                     print(f"🧹 Rental Monitor: Found ORPHANED busy car {car.name} (ID: {car.id}). Resetting to FREE.")
                     car.status = CarStatus.FREE
+                    changed_cars.append(car)
                     orphaned_count += 1
                     
                     # Safety stop stream
@@ -85,6 +89,8 @@ async def check_expired_rentals():
                 await db.commit()
                 print(f"✅ Rental Monitor: Closed {expired_count} expired rentals and fixed {orphaned_count} orphaned cars.")
                 # Broadcast update to all clients
+                for car in changed_cars:
+                    await publish_car_change(car)
                 await manager.broadcast_status_update()
             elif expired_count == 0 and orphaned_count == 0:
                 # print("👍 Rental Monitor: nominal.") # reduce log noise
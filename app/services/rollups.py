@@ -0,0 +1,36 @@
+"""
+Daily rollup counters for the admin dashboard.
+
+Call `bump_daily_stats` inside the same session/transaction as the change it
+counts (new user, rental start, successful top-up); the counter is then
+committed or rolled back together with it. The upsert is a single statement,
+so concurrent workers never lose increments.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_stats import DailyStats
+
+COUNTERS = ("new_users", "rentals_started", "topups_count", "revenue_uah")
+
+
+async def bump_daily_stats(db: AsyncSession, day: Optional[date] = None, **deltas):
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown daily counters: {', '.join(sorted(unknown))}")
+    if not deltas:
+        return
+
+    day = day or datetime.utcnow().date()
+    stmt = insert(DailyStats).values(day=day, updated_at=datetime.utcnow(), **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={
+            **{name: getattr(DailyStats, name) + stmt.excluded[name] for name in deltas},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
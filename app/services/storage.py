@@ -0,0 +1,154 @@
+"""
+Content-addressed upload storage.
+
+Uploaded files are stored under a key derived from their content,
+`{prefix}/{sha256}{ext}` (e.g. "cars/9f86d0...png"), so identical uploads
+share one blob and a key never changes meaning: its URL can be cached
+forever. Nothing is deleted when an upload is replaced; app/services/upload_gc.py
+removes blobs no longer referenced by `Car.image_url` / `User.avatar_url`.
+
+Backends implement `Storage`:
+- "local": files under frontend/uploads, served by the /frontend static mount
+An object-store backend (S3 and the like) only has to provide the same
+methods, with `local_path` returning None; the image variant pipeline
+needs local files and skips blobs it can't read.
+Pick one with UPLOAD_STORAGE_BACKEND.
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.config import settings
+
+
+class Storage(ABC):
+    """Interface shared by all backends. Keys are "/"-separated relative paths."""
+
+    base_url: str
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        """Storage key behind a public URL, or None for URLs we don't store"""
+        prefix = f"{self.base_url}/"
+        if not url or not url.startswith(prefix):
+            return None
+        key = url[len(prefix):].split("?", 1)[0]
+        if not key or ".." in key.split("/"):
+            return None
+        return key
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path of a blob, or None if the backend isn't local"""
+        return None
+
+    @abstractmethod
+    def staging_file(self) -> Tuple[int, str]:
+        """(fd, path) of a new temporary file for an incoming upload"""
+
+    @abstractmethod
+    async def put(self, tmp_path: str, key: str) -> bool:
+        """
+        Stores a finished staging file under `key` (consuming it).
+        Returns False if the key already existed (a duplicate upload); its
+        age is then reset, so garbage collection treats it like a new upload.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str, older_than: Optional[float] = None) -> bool:
+        """
+        Removes a blob; with `older_than` (unix time) only if it wasn't
+        written or re-uploaded since. Returns whether it was removed.
+        """
+
+    @abstractmethod
+    async def list(self, prefix: str) -> List[Tuple[str, float]]:
+        """(key, modified unix time) of every blob under `prefix`"""
+
+    @abstractmethod
+    async def purge_staging(self, older_than: float) -> int:
+        """Removes staging files abandoned before `older_than` (unix time)"""
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: Path, base_url: str):
+        self.root = root
+        self.base_url = base_url
+        self.staging = root / ".staging"
+        self.staging.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, key):
+        return self.root / key
+
+    def staging_file(self):
+        # Same filesystem as the blobs, so `put` is an atomic rename
+        return tempfile.mkstemp(dir=self.staging, prefix=".upload-", suffix=".part")
+
+    def _put(self, tmp_path: str, key: str) -> bool:
+        path = self.root / key
+        if path.exists():
+            os.remove(tmp_path)
+            os.utime(path)
+            return False
+        # mkstemp creates 0600; published blobs must be readable by a proxy or backup user too
+        os.chmod(tmp_path, 0o644)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)  # Atomic: readers never see a partial file
+        return True
+
+    async def put(self, tmp_path, key):
+        return await asyncio.to_thread(self._put, tmp_path, key)
+
+    def _delete(self, key: str, older_than: Optional[float]) -> bool:
+        path = self.root / key
+        try:
+            if older_than is not None and path.stat().st_mtime >= older_than:
+                return False
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def delete(self, key, older_than=None):
+        return await asyncio.to_thread(self._delete, key, older_than)
+
+    def _list(self, prefix: str) -> List[Tuple[str, float]]:
+        directory = self.root / prefix
+        if not directory.is_dir():
+            return []
+        blobs = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Dotfiles are in-progress writes
+                if entry.is_file() and not entry.name.startswith("."):
+                    blobs.append((f"{prefix}/{entry.name}", entry.stat().st_mtime))
+        return blobs
+
+    async def list(self, prefix):
+        return await asyncio.to_thread(self._list, prefix)
+
+    def _purge_staging(self, older_than: float) -> int:
+        purged = 0
+        with os.scandir(self.staging) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < older_than:
+                    Path(entry.path).unlink(missing_ok=True)
+                    purged += 1
+        return purged
+
+    async def purge_staging(self, older_than):
+        return await asyncio.to_thread(self._purge_staging, older_than)
+
+
+def _create_storage() -> Storage:
+    backend = settings.UPLOAD_STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalStorage(Path("frontend/uploads"), "/frontend/uploads")
+    raise ValueError(f"Unknown UPLOAD_STORAGE_BACKEND: {settings.UPLOAD_STORAGE_BACKEND}")
+
+
+storage = _create_storage()
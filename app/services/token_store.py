@@ -0,0 +1,245 @@
+"""
+Verification / password-reset token store.
+
+Replaces the module-level `verification_store` dict in app/routers/auth.py.
+Records are keyed by (purpose, email) with a secondary index on the
+magic-link token, so both lookups are O(1). Every record has a TTL and an
+attempt counter; a background task evicts expired records.
+
+Backends:
+- "memory": per-process dicts, fine for a single worker and for tests
+- "database": the verification_tokens table, shared by all workers and
+  surviving restarts
+Pick one with TOKEN_STORE_BACKEND.
+"""
+import asyncio
+import heapq
+from abc import ABC, abstractmethod
+import hmac
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.verification_token import VerificationToken
+
+VERIFY = "verify"
+RESET = "reset"
+LOGIN = "login"  # One-time handoff from a magic link to a token pair
+
+
+@dataclass
+class TokenRecord:
+    email: str
+    purpose: str
+    code: str
+    token: Optional[str]
+    expires_at: datetime
+    attempts: int = 0
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= datetime.utcnow()
+
+
+def _codes_match(expected: str, given: str) -> bool:
+    return hmac.compare_digest(expected.encode(), (given or "").encode())
+
+
+class TokenStore(ABC):
+    """Interface shared by all backends"""
+
+    @abstractmethod
+    async def issue(self, email: str, purpose: str, code: str, token: Optional[str], ttl: timedelta) -> TokenRecord:
+        """Stores a new code for (email, purpose), replacing any previous one"""
+
+    @abstractmethod
+    async def get_by_token(self, token: str, purpose: str) -> Optional[TokenRecord]:
+        ...
+
+    @abstractmethod
+    async def check_code(self, email: str, purpose: str, code: str) -> bool:
+        """
+        Counts an attempt and returns True if `code` matches.
+        The record is dropped after TOKEN_MAX_ATTEMPTS wrong tries.
+        """
+
+    @abstractmethod
+    async def consume(self, email: str, purpose: str):
+        ...
+
+    @abstractmethod
+    async def evict_expired(self) -> int:
+        ...
+
+
+class InMemoryTokenStore(TokenStore):
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+        self._by_key: Dict[Tuple[str, str], TokenRecord] = {}
+        self._by_token: Dict[str, Tuple[str, str]] = {}
+        # (expires_at, key) min-heap; stale entries are skipped on eviction
+        self._expiry: List[Tuple[datetime, Tuple[str, str]]] = []
+
+    def _drop(self, key):
+        record = self._by_key.pop(key, None)
+        if record and record.token:
+            self._by_token.pop(record.token, None)
+
+    def _live(self, key) -> Optional[TokenRecord]:
+        record = self._by_key.get(key)
+        if record and record.expired:
+            self._drop(key)
+            return None
+        return record
+
+    async def issue(self, email, purpose, code, token, ttl):
+        key = (purpose, email)
+        self._drop(key)
+        record = TokenRecord(email=email, purpose=purpose, code=code, token=token,
+                             expires_at=datetime.utcnow() + ttl)
+        self._by_key[key] = record
+        if token:
+            self._by_token[token] = key
+        heapq.heappush(self._expiry, (record.expires_at, key))
+        return record
+
+    async def get_by_token(self, token, purpose):
+        key = self._by_token.get(token)
+        if not key or key[0] != purpose:
+            return None
+        return self._live(key)
+
+    async def check_code(self, email, purpose, code):
+        key = (purpose, email)
+        record = self._live(key)
+        if not record:
+            return False
+        record.attempts += 1
+        if _codes_match(record.code, code):
+            return True
+        if record.attempts >= self.max_attempts:
+            self._drop(key)
+        return False
+
+    async def consume(self, email, purpose):
+        self._drop((purpose, email))
+
+    async def evict_expired(self):
+        now = datetime.utcnow()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            record = self._by_key.get(key)
+            # Only drop if this heap entry still describes the current record
+            if record and record.expires_at == expires_at:
+                self._drop(key)
+                evicted += 1
+        return evicted
+
+
+class DatabaseTokenStore(TokenStore):
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+
+    @staticmethod
+    def _record(row: VerificationToken) -> TokenRecord:
+        return TokenRecord(email=row.email, purpose=row.purpose, code=row.code, token=row.token,
+                           expires_at=row.expires_at, attempts=row.attempts)
+
+    async def issue(self, email, purpose, code, token, ttl):
+        expires_at = datetime.utcnow() + ttl
+        values = dict(email=email, purpose=purpose, code=code, token=token, attempts=0,
+                      expires_at=expires_at, created_at=datetime.utcnow())
+        stmt = insert(VerificationToken).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_verification_tokens_email_purpose",
+            set_={k: stmt.excluded[k] for k in ("code", "token", "attempts", "expires_at", "created_at")},
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+        return TokenRecord(email=email, purpose=purpose, code=code, token=token, expires_at=expires_at)
+
+    async def get_by_token(self, token, purpose):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(VerificationToken).where(
+                    VerificationToken.token == token,
+                    VerificationToken.purpose == purpose,
+                    VerificationToken.expires_at > datetime.utcnow(),
+                )
+            )
+            row = result.scalars().first()
+            return self._record(row) if row else None
+
+    async def check_code(self, email, purpose, code):
+        async with AsyncSessionLocal() as db:
+            # Count the attempt atomically, so parallel guesses can't bypass the limit
+            result = await db.execute(
+                update(VerificationToken)
+                .where(
+                    VerificationToken.email == email,
+                    VerificationToken.purpose == purpose,
+                    VerificationToken.expires_at > datetime.utcnow(),
+                )
+                .values(attempts=VerificationToken.attempts + 1)
+                .returning(VerificationToken.code, VerificationToken.attempts)
+            )
+            row = result.first()
+            if not row:
+                await db.commit()
+                return False
+            matched = _codes_match(row.code, code)
+            if not matched and row.attempts >= self.max_attempts:
+                await db.execute(
+                    delete(VerificationToken).where(
+                        VerificationToken.email == email, VerificationToken.purpose == purpose
+                    )
+                )
+            await db.commit()
+            return matched
+
+    async def consume(self, email, purpose):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(VerificationToken).where(
+                    VerificationToken.email == email, VerificationToken.purpose == purpose
+                )
+            )
+            await db.commit()
+
+    async def evict_expired(self):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(VerificationToken).where(VerificationToken.expires_at <= datetime.utcnow())
+            )
+            await db.commit()
+            return result.rowcount or 0
+
+
+def _create_store() -> TokenStore:
+    backend = settings.TOKEN_STORE_BACKEND.lower()
+    if backend == "database":
+        return DatabaseTokenStore(settings.TOKEN_MAX_ATTEMPTS)
+    if backend == "memory":
+        return InMemoryTokenStore(settings.TOKEN_MAX_ATTEMPTS)
+    raise ValueError(f"Unknown TOKEN_STORE_BACKEND: {settings.TOKEN_STORE_BACKEND}")
+
+
+token_store = _create_store()
+
+
+async def start_token_eviction(interval_seconds: int = 60):
+    print("🚀 Token Store Eviction Started")
+    while True:
+        try:
+            await token_store.evict_expired()
+        except Exception as e:
+            print(f"❌ Token Store Eviction Error: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,141 @@
+"""
+Garbage collection of unreferenced uploads.
+
+Every UPLOAD_GC_INTERVAL_SECONDS a mark-and-sweep pass lists the blobs in
+upload storage, marks the ones `Car.image_url` / `User.avatar_url` point
+at, and deletes the rest together with their image variants (see
+app/services/images.py). Blobs younger than UPLOAD_GC_GRACE_HOURS are kept:
+a car image is uploaded before the car form is saved, and a duplicate
+upload resets the age of the blob it maps to. Only one worker sweeps at a
+time (Postgres advisory lock).
+"""
+import asyncio
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.car import Car
+from app.models.user import User
+from app.services.storage import storage
+
+PREFIXES = ("cars", "avatars")
+ADVISORY_LOCK_ID = 0x75706763  # Arbitrary, unique to this job
+
+# `{stem}-{width}.{fmt}` and `{stem}.variants.json`, written by app/utils/images.py
+_VARIANT = re.compile(r"^(?P<stem>.+)-\d{2,4}\.(webp|avif)$")
+_MANIFEST_SUFFIX = ".variants.json"
+
+stats = {"runs": 0, "deleted_blobs": 0, "deleted_variants": 0, "purged_staging": 0}
+
+
+def _owner(key: str) -> Optional[str]:
+    """`prefix/stem` of the blob a derivative belongs to, or None for a blob itself"""
+    prefix, _, name = key.rpartition("/")
+    if name.endswith(_MANIFEST_SUFFIX):
+        return f"{prefix}/{name[:-len(_MANIFEST_SUFFIX)]}"
+    match = _VARIANT.match(name)
+    if match:
+        return f"{prefix}/{match.group('stem')}"
+    return None
+
+
+def _stem(key: str) -> str:
+    return key.rsplit(".", 1)[0]
+
+
+async def referenced_keys() -> Set[str]:
+    async with AsyncSessionLocal() as db:
+        car_urls = (await db.execute(select(Car.image_url).where(Car.image_url.isnot(None)).distinct())).scalars().all()
+        avatar_urls = (await db.execute(select(User.avatar_url).where(User.avatar_url.isnot(None)).distinct())).scalars().all()
+    return {key for key in map(storage.key_from_url, [*car_urls, *avatar_urls]) if key}
+
+
+async def is_referenced(url: str) -> bool:
+    async with AsyncSessionLocal() as db:
+        in_cars = (await db.execute(select(func.count()).select_from(Car).where(Car.image_url == url))).scalar()
+        in_users = (await db.execute(select(func.count()).select_from(User).where(User.avatar_url == url))).scalar()
+    return bool(in_cars or in_users)
+
+
+async def delete_blob(key: str, older_than: Optional[float] = None, derived: Optional[List[str]] = None) -> bool:
+    """
+    Deletes a blob and its variants (`derived`, looked up when not given);
+    returns False if the blob wasn't removed.
+    """
+    if not await storage.delete(key, older_than=older_than):
+        return False
+    stats["deleted_blobs"] += 1
+    if derived is None:
+        stem = _stem(key)
+        derived = [other for other, _ in await storage.list(key.rpartition("/")[0]) if _owner(other) == stem]
+    for other in derived:
+        if await storage.delete(other):
+            stats["deleted_variants"] += 1
+    return True
+
+
+async def _sweep() -> int:
+    cutoff = time.time() - settings.UPLOAD_GC_GRACE_HOURS * 3600
+    blobs: Dict[str, float] = {}
+    derived: Dict[str, List[Tuple[str, float]]] = defaultdict(list)  # stem -> variants
+    for prefix in PREFIXES:
+        for key, mtime in await storage.list(prefix):
+            owner = _owner(key)
+            if owner is None:
+                blobs[key] = mtime
+            else:
+                derived[owner].append((key, mtime))
+
+    # Marked after listing, so a blob attached meanwhile is still seen as referenced
+    referenced = await referenced_keys()
+    deleted = 0
+    for key, mtime in blobs.items():
+        if key not in referenced and mtime < cutoff:
+            # Re-checks the age: a duplicate upload may have claimed the blob since listing
+            variants = [other for other, _ in derived.get(_stem(key), [])]
+            if await delete_blob(key, older_than=cutoff, derived=variants):
+                deleted += 1
+
+    # Variants whose blob is already gone (e.g. an interrupted sweep)
+    stems = {_stem(key) for key in blobs}
+    for stem, variants in derived.items():
+        if stem in stems:
+            continue
+        for key, mtime in variants:
+            if mtime < cutoff and await storage.delete(key, older_than=cutoff):
+                stats["deleted_variants"] += 1
+
+    stats["purged_staging"] += await storage.purge_staging(cutoff)
+    return deleted
+
+
+async def collect_garbage() -> int:
+    """One sweep; returns how many blobs were deleted (0 if another worker holds the lock)"""
+    async with AsyncSessionLocal() as lock_db:
+        locked = (await lock_db.execute(select(func.pg_try_advisory_lock(ADVISORY_LOCK_ID)))).scalar()
+        if not locked:
+            return 0
+        try:
+            deleted = await _sweep()
+            stats["runs"] += 1
+            return deleted
+        finally:
+            await lock_db.execute(select(func.pg_advisory_unlock(ADVISORY_LOCK_ID)))
+
+
+async def start_upload_gc():
+    print("🚀 Upload GC Started")
+    while True:
+        try:
+            deleted = await collect_garbage()
+            if deleted:
+                print(f"🧹 Upload GC: deleted {deleted} unreferenced uploads")
+        except Exception as e:
+            print(f"❌ Upload GC Error: {e}")
+        await asyncio.sleep(settings.UPLOAD_GC_INTERVAL_SECONDS)
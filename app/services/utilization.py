@@ -0,0 +1,150 @@
+"""
+Per-car utilization from the car status event log.
+
+A sweep line walks each car's status transitions in time order and
+attributes the time between consecutive events to the status that was in
+effect, splitting at UTC midnight. A car's deletion is logged as an event
+without a status; no time is attributed after it. Results are stored per car per day in
+`car_utilization_daily`; only days that are complete and not yet computed
+are processed, so each run reads just the new slice of the log (plus the
+last event before it, via the (car_id, at) index).
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import AsyncSessionLocal
+from app.models.car import CarStatus
+from app.models.car_status_event import CarStatusEvent
+from app.models.car_utilization import CarUtilizationDaily
+
+STATUS_FIELDS = {
+    CarStatus.BUSY: "busy_seconds",
+    CarStatus.FREE: "free_seconds",
+    CarStatus.OFFLINE: "offline_seconds",
+}
+
+
+def sweep_daily(
+    initial_status: Optional[CarStatus],
+    events: Iterable[Tuple[datetime, CarStatus]],
+    start: datetime,
+    end: datetime,
+) -> Dict[date, Dict[str, float]]:
+    """
+    Seconds per status per day in [start, end) for one car.
+    `events` must be sorted by time and lie within [start, end).
+    Time before the first known status is not counted.
+    """
+    totals: Dict[date, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def attribute(status, t0, t1):
+        if status is None:
+            return
+        field = STATUS_FIELDS[CarStatus(status)]
+        while t0 < t1:
+            midnight = datetime.combine(t0.date() + timedelta(days=1), time.min)
+            segment_end = min(t1, midnight)
+            totals[t0.date()][field] += (segment_end - t0).total_seconds()
+            t0 = segment_end
+
+    current, cursor = initial_status, start
+    for at, status in events:
+        attribute(current, cursor, at)
+        current, cursor = status, at
+    attribute(current, cursor, end)
+    return totals
+
+
+async def compute_days(db: AsyncSession, day_from: date, day_to: date) -> int:
+    """(Re)computes utilization rows for days in [day_from, day_to); returns rows written"""
+    start = datetime.combine(day_from, time.min)
+    end = datetime.combine(day_to, time.min)
+    if start >= end:
+        return 0
+
+    # Status in effect at `start`: latest event before it, per car
+    initial_result = await db.execute(
+        select(CarStatusEvent.car_id, CarStatusEvent.status)
+        .where(CarStatusEvent.at < start)
+        .distinct(CarStatusEvent.car_id)
+        .order_by(CarStatusEvent.car_id, CarStatusEvent.at.desc(), CarStatusEvent.id.desc())
+    )
+    # Cars deleted before `start` have nothing left to track
+    initial = {car_id: status for car_id, status in initial_result.all() if status is not None}
+
+    events_result = await db.execute(
+        select(CarStatusEvent.car_id, CarStatusEvent.at, CarStatusEvent.status)
+        .where(CarStatusEvent.at >= start, CarStatusEvent.at < end)
+        .order_by(CarStatusEvent.car_id, CarStatusEvent.at, CarStatusEvent.id)
+    )
+    events = defaultdict(list)
+    for car_id, at, status in events_result.all():
+        events[car_id].append((at, status))
+
+    now = datetime.utcnow()
+    rows = []
+    for car_id in set(initial) | set(events):
+        for day, seconds in sweep_daily(initial.get(car_id), events.get(car_id, []), start, end).items():
+            busy = int(seconds["busy_seconds"])
+            free = int(seconds["free_seconds"])
+            offline = int(seconds["offline_seconds"])
+            tracked = busy + free + offline
+            rows.append({
+                "car_id": car_id,
+                "day": day,
+                "busy_seconds": busy,
+                "free_seconds": free,
+                "offline_seconds": offline,
+                "utilization_pct": round(100.0 * busy / tracked, 2) if tracked else 0.0,
+                "computed_at": now,
+            })
+
+    # Chunked to stay well under the bind-parameter limit
+    for i in range(0, len(rows), 1000):
+        stmt = insert(CarUtilizationDaily).values(rows[i:i + 1000])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CarUtilizationDaily.car_id, CarUtilizationDaily.day],
+            set_={
+                name: stmt.excluded[name]
+                for name in ("busy_seconds", "free_seconds", "offline_seconds", "utilization_pct", "computed_at")
+            },
+        )
+        await db.execute(stmt)
+    await db.commit()
+    return len(rows)
+
+
+async def compute_pending_days(db: AsyncSession, max_days: int = 31) -> int:
+    """Computes every complete day after the last computed one (bounded per run)"""
+    last_day = (await db.execute(select(func.max(CarUtilizationDaily.day)))).scalar()
+    if last_day is None:
+        first_event = (await db.execute(select(func.min(CarStatusEvent.at)))).scalar()
+        if first_event is None:
+            return 0
+        day_from = first_event.date()
+    else:
+        day_from = last_day + timedelta(days=1)
+
+    today = datetime.utcnow().date()
+    day_to = min(today, day_from + timedelta(days=max_days))
+    return await compute_days(db, day_from, day_to)
+
+
+async def start_utilization_worker(interval_seconds: int = 3600):
+    print("🚀 Utilization Worker Started")
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                written = await compute_pending_days(db)
+                if written:
+                    print(f"📊 Utilization: stored {written} car-day rows")
+        except Exception as e:
+            print(f"❌ Utilization Worker Error: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,76 @@
+"""
+Image derivatives (resized WebP / AVIF copies of an uploaded image).
+
+Runs inside the image worker processes (see app/services/images.py), so it
+only depends on Pillow and the filesystem.
+"""
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Iterable
+
+from PIL import Image, ImageOps, features
+
+# Reject decompression bombs outright instead of warning
+Image.MAX_IMAGE_PIXELS = 40_000_000
+warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+QUALITY = {"webp": 80, "avif": 60}
+
+
+def available_formats() -> list:
+    formats = ["webp"]
+    if features.check("avif"):
+        formats.append("avif")
+    return formats
+
+
+def manifest_path(source: Path) -> Path:
+    return source.with_name(f"{source.stem}.variants.json")
+
+
+def _save(img: Image.Image, path: Path, fmt: str):
+    tmp = path.with_name(f".{path.name}.part")
+    options = {"quality": QUALITY[fmt]}
+    if fmt == "webp":
+        options["method"] = 4
+    img.save(tmp, format=fmt.upper(), **options)
+    os.replace(tmp, path)
+
+
+def render_variants(source: str, widths: Iterable[int]) -> Dict[str, Dict[str, str]]:
+    """
+    Writes `{stem}-{width}.{fmt}` next to `source` for each width (never
+    upscaling; an image narrower than every width gets one copy at its own
+    width) and a `{stem}.variants.json` manifest.
+    Returns {format: {width: filename}}.
+    """
+    path = Path(source)
+    widths = sorted(set(widths))
+    with Image.open(path) as img:
+        # JPEG can decode straight at a reduced scale, much cheaper than a full decode
+        img.draft("RGB", (widths[-1], 1))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+        targets = [w for w in widths if w <= img.width] or [img.width]
+        variants: Dict[str, Dict[str, str]] = {fmt: {} for fmt in available_formats()}
+        # Largest first, each step resized from the previous one
+        current = img
+        for width in reversed(targets):
+            if width != current.width:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.LANCZOS)
+            for fmt in variants:
+                filename = f"{path.stem}-{width}.{fmt}"
+                _save(current, path.with_name(filename), fmt)
+                variants[fmt][str(width)] = filename
+
+    manifest = manifest_path(path)
+    tmp = manifest.with_name(f".{manifest.name}.part")
+    tmp.write_text(json.dumps(variants))
+    os.replace(tmp, manifest)
+    return variants
+
@@ -74,6 +74,23 @@ class LiqPayClient:
             "checkout_url": "https://www.liqpay.ua/api/3/checkout"
         }
 
+    def get_status_params(self, order_id: str) -> dict:
+        """
+        Generate signed form fields for a payment status request
+        (POST to https://www.liqpay.ua/api/request).
+        """
+        params = {
+            "version": 3,
+            "public_key": self.public_key,
+            "action": "status",
+            "order_id": order_id,
+        }
+        data = self._encode_data(params)
+        return {
+            "data": data,
+            "signature": self._generate_signature(data),
+        }
+
     def verify_signature(self, data: str, signature: str) -> bool:
         """Verify callback signature is valid."""
         expected = self._generate_signature(data)
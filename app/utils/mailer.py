@@ -0,0 +1,162 @@
+"""
+Mail transports used by the email outbox worker.
+
+- "smtp": a pool of persistent, authenticated SMTP connections (aiosmtplib).
+  Each connection sends many messages back to back instead of paying a TCP
+  + TLS handshake + AUTH per email; the pool size caps concurrent sends.
+  Connections are recycled after SMTP_MAX_MESSAGES_PER_CONNECTION messages
+  or SMTP_IDLE_SECONDS of inactivity (servers drop idle sessions anyway).
+- "console": prints the message (recipient, text and links, so codes and
+  magic links are usable) and keeps it in `sent`; a local stand-in for
+  development and tests, also used when "smtp" is selected but no
+  mail_server is configured. Any SMTP debugging server (e.g. aiosmtpd)
+  also works with the "smtp" transport.
+"""
+import asyncio
+import html as html_lib
+import logging
+import re
+import time
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+import aiosmtplib
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    def __init__(self):
+        self.smtp: Optional[aiosmtplib.SMTP] = None
+        self.sent = 0
+        self.last_used = 0.0
+
+    @property
+    def usable(self) -> bool:
+        return (
+            self.smtp is not None
+            and self.smtp.is_connected
+            and self.sent < settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+            and time.monotonic() - self.last_used < settings.SMTP_IDLE_SECONDS
+        )
+
+    async def close(self):
+        if self.smtp is not None and self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except aiosmtplib.SMTPException:
+                self.smtp.close()
+        self.smtp = None
+
+    async def ensure_open(self):
+        if self.usable:
+            return
+        await self.close()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.mail_server,
+            port=settings.mail_port,
+            use_tls=settings.mail_ssl_tls,
+            start_tls=settings.mail_starttls if not settings.mail_ssl_tls else False,
+            validate_certs=settings.validate_certs,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        if settings.use_credentials and settings.mail_username:
+            await smtp.login(settings.mail_username, settings.mail_password)
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SmtpPool:
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: Optional[asyncio.Queue] = None
+        self.connects = 0
+        self.reconnects = 0
+
+    def _queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(_PooledConnection())
+        return self._idle
+
+    @staticmethod
+    def build_message(recipient: str, subject: str, html: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = settings.mail_from
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content("Цей лист містить HTML. Відкрийте його у поштовому клієнті з підтримкою HTML.")
+        message.add_alternative(html, subtype="html")
+        return message
+
+    async def send(self, recipient: str, subject: str, html: str):
+        message = self.build_message(recipient, subject, html)
+        queue = self._queue()
+        connection = await queue.get()
+        try:
+            for attempt in (1, 2):
+                was_open = connection.usable
+                await connection.ensure_open()
+                if not was_open:
+                    self.connects += 1
+                try:
+                    await connection.smtp.send_message(message)
+                    break
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Server closed a pooled session; retry once on a fresh one
+                    await connection.close()
+                    self.reconnects += 1
+                    if attempt == 2:
+                        raise
+            connection.sent += 1
+            connection.last_used = time.monotonic()
+        except Exception:
+            await connection.close()
+            raise
+        finally:
+            queue.put_nowait(connection)
+
+    def stats(self) -> dict:
+        return {"pool_size": self.size, "connects": self.connects, "reconnects": self.reconnects}
+
+
+class ConsoleTransport:
+    def __init__(self, keep: int = 100):
+        self.keep = keep
+        self.sent: List[Tuple[str, str, str]] = []
+
+    @staticmethod
+    def to_text(html: str) -> str:
+        body = re.sub(r"(?is)<(style|script)[^>]*>.*?</\1>", " ", html)
+        text = html_lib.unescape(re.sub(r"<[^>]+>", " ", body))
+        links = re.findall(r'href="([^"]+)"', html)
+        lines = [" ".join(text.split())] + [f"Link: {html_lib.unescape(link)}" for link in links]
+        return "\n".join(lines)
+
+    async def send(self, recipient: str, subject: str, html: str):
+        print(f"📧 CONSOLE EMAIL to {recipient}: {subject}\n{self.to_text(html)}")
+        self.sent.append((recipient, subject, html))
+        del self.sent[:-self.keep]
+
+    def stats(self) -> dict:
+        return {"kept": len(self.sent)}
+
+
+def _create_transport():
+    transport = settings.EMAIL_TRANSPORT.lower()
+    if transport == "smtp":
+        if not settings.mail_server:
+            logger.warning("EMAIL_TRANSPORT=smtp but mail_server is not set; printing emails to the console")
+            return ConsoleTransport()
+        return SmtpPool(settings.SMTP_POOL_SIZE)
+    if transport == "console":
+        return ConsoleTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT: {settings.EMAIL_TRANSPORT}")
+
+
+transport = _create_transport()
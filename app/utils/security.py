@@ -1,12 +1,14 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Tuple, Union, Any
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with other rounds / schemes still verify and get re-hashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -14,6 +16,54 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# bcrypt takes tens of milliseconds and releases the GIL, so async handlers
+# run it in a small dedicated pool instead of blocking the event loop.
+# The pool size caps concurrency; extra calls wait in the pool's queue.
+_password_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_password_metrics = {"calls": 0, "in_flight": 0, "queue_ms_total": 0.0, "queue_ms_max": 0.0, "run_ms_total": 0.0}
+
+async def _run_in_password_pool(func, *args):
+    submitted = time.perf_counter()
+    started = []
+
+    def job():
+        started.append(time.perf_counter())
+        return func(*args)
+
+    _password_metrics["in_flight"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_pool, job)
+    finally:
+        finished = time.perf_counter()
+        _password_metrics["in_flight"] -= 1
+        _password_metrics["calls"] += 1
+        if started:
+            queue_ms = (started[0] - submitted) * 1000
+            _password_metrics["queue_ms_total"] += queue_ms
+            _password_metrics["queue_ms_max"] = max(_password_metrics["queue_ms_max"], queue_ms)
+            _password_metrics["run_ms_total"] += (finished - started[0]) * 1000
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_password_pool(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (is_valid, new_hash). new_hash is set when the stored hash uses
+    outdated parameters and should be replaced.
+    """
+    return await _run_in_password_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_pool_stats() -> dict:
+    calls = _password_metrics["calls"]
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "calls": calls,
+        "in_flight": _password_metrics["in_flight"],
+        "avg_queue_ms": round(_password_metrics["queue_ms_total"] / calls, 2) if calls else None,
+        "max_queue_ms": round(_password_metrics["queue_ms_max"], 2),
+        "avg_run_ms": round(_password_metrics["run_ms_total"] / calls, 2) if calls else None,
+    }
+
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -30,10 +80,3 @@ def decode_access_token(token: str) -> Optional[dict]:
         return decoded_token if decoded_token["exp"] >= datetime.utcnow().timestamp() else None
     except JWTError:
         return None
-
-def verify_google_token(token: str) -> Optional[dict]:
-    try:
-        id_info = id_token.verify_oauth2_token(token, requests.Request(), settings.GOOGLE_CLIENT_ID)
-        return id_info
-    except ValueError:
-        return None
@@ -52,7 +52,15 @@ class ConnectionManager:
         message = json.dumps({"type": "status_update", "online_cars": online_cars})
         
         # Broadcast to all observers (dashboard)
-        for connection in self.observing_users:
+        await self._broadcast_to_observers(message)
+
+    async def broadcast_car_change(self, epoch: str, event: dict):
+        message = json.dumps({"type": "car_change", "epoch": epoch, **event})
+        await self._broadcast_to_observers(message)
+
+    async def _broadcast_to_observers(self, message: str):
+        # Iterate over a copy: failed sockets are removed while we loop
+        for connection in list(self.observing_users):
             try:
                 await connection.send_text(message)
             except:
@@ -9,6 +9,8 @@ from app.database import AsyncSessionLocal
 from app.models.user import User
 from app.models.rental import Rental
 from app.models.transaction import Transaction
+from app.models.refresh_token import RefreshToken
+from app.models.support import SupportTicket
 from sqlalchemy.future import select
 from sqlalchemy import delete
 
@@ -37,6 +39,16 @@ async def delete_user_data(email: str):
         r_result = await db.execute(delete(Rental).where(Rental.user_id == user_id))
         print(f"Deleted {r_result.rowcount} rentals.")
         
+        # Delete Refresh Tokens (sessions)
+        print("Deleting sessions...")
+        s_result = await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+        print(f"Deleted {s_result.rowcount} refresh tokens.")
+        
+        # Delete Support Tickets
+        print("Deleting support tickets...")
+        st_result = await db.execute(delete(SupportTicket).where(SupportTicket.user_id == user_id))
+        print(f"Deleted {st_result.rowcount} support tickets.")
+        
         # Delete User
         print("Deleting user account...")
         u_result = await db.execute(delete(User).where(User.id == user_id))
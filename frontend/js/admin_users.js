@@ -21,7 +21,7 @@ async function loadUsers() {
             tr.innerHTML = `
                 <td class="p-3">
                     <div class="flex items-center space-x-3">
-                        <img src="${user.avatar_url || 'https://ui-avatars.com/api/?name=' + user.name}" class="w-8 h-8 rounded-full">
+                        <img src="${user.avatar_url || 'https://ui-avatars.com/api/?name=' + user.name}" srcset="${variantSrcset(user.avatar_variants)}" sizes="32px" class="w-8 h-8 rounded-full">
                         <span>${user.email}</span>
                     </div>
                 </td>
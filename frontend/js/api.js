@@ -3,23 +3,111 @@ const API_URL = ""; // Relative path to support any port/domain
 class ApiClient {
     constructor() {
         this.token = localStorage.getItem('access_token');
+        this.refreshToken = localStorage.getItem('refresh_token');
+        this.refreshing = null;
+        this.pendingLogin = null;
+
+        // Magic-link sign-in lands with "#login=<one-time code>"; exchange it for a token pair
+        const handoff = new URLSearchParams(window.location.hash.slice(1)).get('login');
+        if (handoff) {
+            history.replaceState(null, '', window.location.pathname + window.location.search);
+            // Whatever session this browser had before (maybe another account) is replaced
+            localStorage.removeItem('access_token');
+            localStorage.removeItem('refresh_token');
+            this.token = null;
+            this.refreshToken = null;
+            this.pendingLogin = fetch(`${API_URL}/api/auth/magic-login`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'ngrok-skip-browser-warning': 'true' },
+                body: JSON.stringify({ token: handoff })
+            })
+                .then(async (response) => {
+                    if (!response.ok) return;
+                    const data = await response.json();
+                    this.setToken(data.access_token, data.refresh_token);
+                })
+                .catch(() => {})
+                .finally(() => { this.pendingLogin = null; });
+        }
     }
 
-    setToken(token) {
+    setToken(token, refreshToken = null) {
         this.token = token;
         localStorage.setItem('access_token', token);
+        if (refreshToken) {
+            this.refreshToken = refreshToken;
+            localStorage.setItem('refresh_token', refreshToken);
+        }
     }
 
     getToken() {
         return this.token;
     }
 
-    logout() {
+    // `revoke`: also end the session server-side (skip it when the token is already unusable)
+    logout(revoke = true) {
+        // Another tab may have rotated the token since this page loaded
+        this.refreshToken = localStorage.getItem('refresh_token');
+        // Revoke the refresh token server-side (best effort)
+        if (revoke && this.refreshToken) {
+            fetch(`${API_URL}/api/auth/logout`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refresh_token: this.refreshToken }),
+                keepalive: true
+            }).catch(() => {});
+        }
         localStorage.removeItem('access_token');
+        localStorage.removeItem('refresh_token');
         window.location.href = '/frontend/auth.html';
     }
 
-    async request(endpoint, method = 'GET', body = null) {
+    // Takes over tokens another tab stored after rotating `sentToken`
+    adoptStoredTokens(sentToken) {
+        const stored = localStorage.getItem('refresh_token');
+        if (!stored || stored === sentToken) return false;
+        this.token = localStorage.getItem('access_token');
+        this.refreshToken = stored;
+        return true;
+    }
+
+    async sendRefresh(refreshToken) {
+        const response = await fetch(`${API_URL}/api/auth/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'ngrok-skip-browser-warning': 'true' },
+            body: JSON.stringify({ refresh_token: refreshToken })
+        });
+        if (response.status === 409) {
+            // Another tab rotated this token a moment ago; wait for it to store the new pair
+            for (let i = 0; i < 10; i++) {
+                await new Promise((resolve) => setTimeout(resolve, 200));
+                if (this.adoptStoredTokens(refreshToken)) return true;
+            }
+            return false;
+        }
+        if (!response.ok) return false;
+        const data = await response.json();
+        this.setToken(data.access_token, data.refresh_token);
+        return true;
+    }
+
+    // Exchanges the refresh token for a new pair; concurrent callers share one request
+    refreshAccessToken() {
+        if (!this.refreshing) {
+            // Always the latest stored token: other tabs rotate it too
+            const sent = this.refreshToken;
+            if (this.adoptStoredTokens(sent)) return Promise.resolve(true);
+            if (!this.refreshToken) return Promise.resolve(false);
+            this.refreshing = this.sendRefresh(this.refreshToken)
+                .catch(() => false)
+                .finally(() => { this.refreshing = null; });
+        }
+        return this.refreshing;
+    }
+
+    async request(endpoint, method = 'GET', body = null, retried = false) {
+        if (this.pendingLogin) await this.pendingLogin;
+
         const headers = {
             'Content-Type': 'application/json'
         };
@@ -45,9 +133,13 @@ class ApiClient {
             const response = await fetch(`${API_URL}${endpoint}`, config);
 
             if (response.status === 401) {
+                // Access token expired: renew it once and retry
+                if (!retried && await this.refreshAccessToken()) {
+                    return this.request(endpoint, method, body, true);
+                }
                 // Token expired or invalid
                 console.warn("Unauthorized, redirecting to login...");
-                this.logout();
+                this.logout(false);
                 return null;
             }
 
@@ -129,3 +221,17 @@ window.showToast = function (message, type = 'info') {
         setTimeout(() => t.remove(), 300);
     }
 };
+
+// "url 320w, url 640w, ..." for an <img srcset> from image_variants / avatar_variants
+window.variantSrcset = function (variants, format = 'webp') {
+    const files = variants && variants[format];
+    if (!files) return '';
+    return Object.entries(files).map(([width, url]) => `${url} ${width}w`).join(', ');
+};
+
+// Points an <img> at an uploaded image, letting the browser pick the variant for `sizes`
+window.setVariantImage = function (img, url, variants, sizes) {
+    img.srcset = variantSrcset(variants);
+    img.sizes = img.srcset ? sizes : '';
+    img.src = url;
+};
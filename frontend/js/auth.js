@@ -152,7 +152,7 @@ async function handleCredentialResponse(response) {
         try {
             const res = await api.post('/api/auth/google', { token: response.credential });
             if (res && res.access_token) {
-                api.setToken(res.access_token);
+                api.setToken(res.access_token, res.refresh_token);
                 window.location.href = 'dashboard.html';
             }
         } catch (err) {
@@ -192,7 +192,7 @@ document.getElementById('loginForm').addEventListener('submit', async (e) => {
     try {
         const res = await api.post('/api/auth/login', { email, password });
         if (res && res.access_token) {
-            api.setToken(res.access_token);
+            api.setToken(res.access_token, res.refresh_token);
             window.location.href = 'dashboard.html';
         }
     } catch (err) {
@@ -383,7 +383,7 @@ document.getElementById('verifyForm').addEventListener('submit', async (e) => {
             });
 
             if (res && res.access_token) {
-                api.setToken(res.access_token);
+                api.setToken(res.access_token, res.refresh_token);
                 window.location.href = 'dashboard.html';
             }
         } catch (err) {
@@ -28,7 +28,7 @@ document.addEventListener('DOMContentLoaded', async () => {
                 mobileBalance.innerHTML = `${userBalance} <small class="text-xs">₴</small>`;
             }
 
-            if (user.avatar_url) document.getElementById('userAvatar').src = user.avatar_url;
+            if (user.avatar_url) setVariantImage(document.getElementById('userAvatar'), user.avatar_url, user.avatar_variants, '36px');
             if (user.name) document.getElementById('userName').innerText = user.name;
 
             // Admin Button Logic - Only show for admin users
@@ -212,10 +212,15 @@ async function loadCars() {
                     
                     <!-- Car Image with Hover Scale -->
                     <div class="absolute inset-0 flex items-center justify-center p-4">
+                        <picture class="contents">
+                        ${car.image_variants && car.image_variants.avif ? `<source type="image/avif" srcset="${variantSrcset(car.image_variants, 'avif')}" sizes="(max-width: 640px) 90vw, 400px">` : ''}
                         <img src="${car.image_url || 'https://images.unsplash.com/photo-1558618666-fcd25c85cd64?auto=format&fit=crop&q=80&w=600'}" 
+                             srcset="${variantSrcset(car.image_variants)}" sizes="(max-width: 640px) 90vw, 400px"
+                             loading="lazy" decoding="async"
                              class="max-h-full max-w-full object-contain transition-transform duration-500 group-hover:scale-110 drop-shadow-2xl"
                              alt="${car.name}"
-                             onerror="this.src='https://images.unsplash.com/photo-1558618666-fcd25c85cd64?auto=format&fit=crop&q=80&w=600'">
+                             onerror="this.parentNode.querySelectorAll('source').forEach(s => s.remove()); this.removeAttribute('srcset'); this.src='https://images.unsplash.com/photo-1558618666-fcd25c85cd64?auto=format&fit=crop&q=80&w=600'">
+                        </picture>
                     </div>
                          
                     <!-- Top Float -->
@@ -373,9 +378,25 @@ function closeRentModal() {
     selectedCarId = null;
 }
 
-function selectDuration(minutes) {
+// Server-side price (tariff packages included); the amount actually charged on start
+function fetchRentalQuote(carId, minutes) {
+    return api.get(`/api/rentals/quote?car_id=${encodeURIComponent(carId)}&minutes=${minutes}`);
+}
+
+function showEstimatedCost(text) {
+    let costEl = document.getElementById('estimatedCost');
+    if (!costEl) {
+        // Add a cost line above the confirm button
+        costEl = document.createElement('div');
+        costEl.id = 'estimatedCost';
+        costEl.className = 'flex justify-between items-center mb-4 text-sm font-bold text-white';
+        document.querySelector('#rentModal .p-6:last-child').insertBefore(costEl, document.querySelector('#rentModal .btn-primary'));
+    }
+    costEl.innerHTML = `<span>${window.t('label_cost')}</span> <span class="text-blue-400">${text}</span>`;
+}
+
+async function selectDuration(minutes) {
     selectedDurationMinutes = minutes;
-    const estimatedCost = (minutes * selectedCarPrice).toFixed(2);
 
     // Update UI styling and text
     const buttons = document.querySelectorAll('.duration-btn');
@@ -395,38 +416,31 @@ function selectDuration(minutes) {
         }
     });
 
-    // Update the visual confirmation of cost if we had a dedicated element, 
-    // but for now let's just update the specific button badges if we can identify them
-    // Or simpler: Update a "Total Cost" display in the modal
-    const costDisplay = document.getElementById('rentalCostDisplay');
-    if (!costDisplay) {
-        // Create it if missing or just append to modal
-        // For this iteration, let's keep it simple and maybe update the button text dynamically?
-        // Actually, let's add a cost line above the button
-        let costEl = document.getElementById('estimatedCost');
-        if (!costEl) {
-            costEl = document.createElement('div');
-            costEl.id = 'estimatedCost';
-            costEl.className = 'flex justify-between items-center mb-4 text-sm font-bold text-white';
-            document.querySelector('#rentModal .p-6:last-child').insertBefore(costEl, document.querySelector('#rentModal .btn-primary'));
-        }
-        costEl.innerHTML = `<span>${window.t('label_cost')}</span> <span class="text-blue-400">${estimatedCost} ₴</span>`;
-    } else {
-        document.getElementById('estimatedCost').innerHTML = `<span>${window.t('label_cost')}</span> <span class="text-blue-400">${estimatedCost} ₴</span>`;
+    if (!selectedCarId) return;
+    const carId = selectedCarId;
+    showEstimatedCost('…');
+    try {
+        const quote = await fetchRentalQuote(carId, minutes);
+        // Ignore answers for a selection the user has already changed
+        if (!quote || carId !== selectedCarId || minutes !== selectedDurationMinutes) return;
+        showEstimatedCost(`${quote.total.toFixed(2)} ₴`);
+    } catch (e) {
+        if (minutes === selectedDurationMinutes) showEstimatedCost('—');
     }
 }
 
 async function confirmRental() {
     if (!selectedCarId) return;
 
-    const cost = selectedDurationMinutes * selectedCarPrice;
-
-    if (userBalance < cost) {
-        showToast(`${window.t('err_insufficient_funds')} ${cost.toFixed(2)} ₴`, 'error');
-        return;
-    }
-
     try {
+        // Same price the server will charge
+        const quote = await fetchRentalQuote(selectedCarId, selectedDurationMinutes);
+        if (!quote) return;
+        if (userBalance < quote.total) {
+            showToast(`${window.t('err_insufficient_funds')} ${quote.total.toFixed(2)} ₴`, 'error');
+            return;
+        }
+
         const res = await api.post('/api/rentals/start', {
             car_id: selectedCarId,
             duration_minutes: selectedDurationMinutes
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+
+# Fix for Windows Python 3.11+ with psycopg
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Add parent directory to path so 'app' module can be found
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+from app.database import AsyncSessionLocal
+from app.models.car import Car
+from app.models.rental import Rental
+from app.models.transaction import Transaction, TransactionStatus
+from app.models.usage_bucket import FLEET_ID, UsageBucket, UsageBucketDriver
+from app.services.analytics import GRANULARITIES, bucket_start
+
+BATCH_SIZE = 1000
+
+async def backfill_analytics():
+    """
+    Rebuilds usage_buckets from the full rental and transaction history.
+    Extensions are attributed to the rental start; rentals created before
+    cost_uah existed are priced at the car's current per-minute rate.
+    """
+    buckets = defaultdict(lambda: defaultdict(int))
+    drivers = set()
+
+    def add(car_id, ts, user_id=None, **deltas):
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(ts, granularity), car_id)
+            for name, value in deltas.items():
+                buckets[key][name] += value
+            if user_id is not None:
+                drivers.add(key + (user_id,))
+
+    async with AsyncSessionLocal() as db:
+        prices = dict((await db.execute(select(Car.id, Car.price_per_minute))).all())
+
+        print("Reading rentals...")
+        result = await db.stream(
+            select(Rental.car_id, Rental.user_id, Rental.started_at, Rental.duration_minutes, Rental.cost_uah)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        async for car_id, user_id, started_at, minutes, cost in result:
+            if not cost:
+                cost = Decimal(str(prices.get(car_id) or 0)) * minutes
+            for bucket_car_id in (car_id, FLEET_ID):
+                add(bucket_car_id, started_at, user_id,
+                    rentals_started=1, rental_minutes_sold=minutes, rental_revenue_uah=Decimal(str(cost)))
+
+        print("Reading successful top-ups...")
+        result = await db.stream(
+            select(Transaction.created_at, Transaction.amount_uah)
+            .where(Transaction.status == TransactionStatus.SUCCESS)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        async for created_at, amount in result:
+            add(FLEET_ID, created_at, topups_count=1, topup_revenue_uah=Decimal(str(amount)))
+
+    for (granularity, start, car_id, user_id) in drivers:
+        buckets[(granularity, start, car_id)]["active_drivers"] += 1
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(UsageBucketDriver))
+        await db.execute(delete(UsageBucket))
+        db.add_all(
+            UsageBucket(granularity=g, bucket_start=start, car_id=car_id, **values)
+            for (g, start, car_id), values in buckets.items()
+        )
+        db.add_all(
+            UsageBucketDriver(granularity=g, bucket_start=start, car_id=car_id, user_id=user_id)
+            for (g, start, car_id, user_id) in drivers
+        )
+        await db.commit()
+
+    print(f"Analytics rebuilt: {len(buckets)} buckets, {len(drivers)} driver marks.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_analytics())
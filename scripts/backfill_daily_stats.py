@@ -0,0 +1,61 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Fix for Windows Python 3.11+ with psycopg
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Add parent directory to path so 'app' module can be found
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, func, cast, Date
+from sqlalchemy.future import select
+from app.database import AsyncSessionLocal
+from app.models.daily_stats import DailyStats
+from app.models.user import User
+from app.models.rental import Rental
+from app.models.transaction import Transaction, TransactionStatus
+
+async def backfill_daily_stats():
+    """
+    Rebuilds the daily_stats rollups from users, rentals and transactions.
+    Run once after the migration (and any time the counters need repairing).
+    """
+    async with AsyncSessionLocal() as db:
+        days = {}
+
+        def row(day):
+            return days.setdefault(day, {"new_users": 0, "rentals_started": 0, "topups_count": 0, "revenue_uah": 0})
+
+        print("Counting users...")
+        result = await db.execute(
+            select(cast(User.created_at, Date), func.count(User.id)).group_by(cast(User.created_at, Date))
+        )
+        for day, count in result.all():
+            row(day)["new_users"] = count
+
+        print("Counting rentals...")
+        result = await db.execute(
+            select(cast(Rental.started_at, Date), func.count(Rental.id)).group_by(cast(Rental.started_at, Date))
+        )
+        for day, count in result.all():
+            row(day)["rentals_started"] = count
+
+        print("Summing successful top-ups...")
+        result = await db.execute(
+            select(cast(Transaction.created_at, Date), func.count(Transaction.id), func.sum(Transaction.amount_uah))
+            .where(Transaction.status == TransactionStatus.SUCCESS)
+            .group_by(cast(Transaction.created_at, Date))
+        )
+        for day, count, total in result.all():
+            row(day)["topups_count"] = count
+            row(day)["revenue_uah"] = total or 0
+
+        await db.execute(delete(DailyStats))
+        db.add_all([DailyStats(day=day, **values) for day, values in days.items() if day is not None])
+        await db.commit()
+        print(f"Daily stats rebuilt for {len(days)} days.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_daily_stats())